@@ -1,4 +1,6 @@
 from editor import Editor
+from music import music_player
+from registry import asset_registry
 from settings import *
 from support import *
 
@@ -11,8 +13,7 @@ class EditorLauncher:
         self.editor = Editor()
 
         # 鼠标指针
-        surf = pygame.image.load('../graphics/cursors/mouse.png').convert_alpha()
-        cursor = pygame.cursors.Cursor((0, 0), surf)
+        cursor = pygame.cursors.Cursor((0, 0), asset_registry.acquire('cursor'))
         pygame.mouse.set_cursor(cursor)
 
     def run(self):
@@ -20,6 +21,7 @@ class EditorLauncher:
             dt = self.clock.tick() / 1000
 
             self.editor.run(dt)
+            music_player.update()
             pygame.display.update()
 
 
@@ -1,10 +1,14 @@
-import pickle
+import sys
 
 import pygame.mixer
 
 from level import Level
+from music import music_player
+from preload import LevelPreloader
+from registry import asset_registry
 from ui import UI
 from overworld import Overworld
+from timer import Timer
 from settings import *
 from support import *
 
@@ -17,98 +21,76 @@ class LevelLauncher:
 
         # overworld
         self.max_level = INIT_MAX_LEVEL
-        self.overworld = Overworld(0, self.max_level, self.display_surface, self.create_level)
+        self.preloader = LevelPreloader()
+        self.overworld = Overworld(0, self.max_level, self.display_surface, self.create_level, self.preloader.request)
+
+        # user interface
+        self.ui = UI(self.display_surface)
+        self.loading_timer = Timer(33)  # 加载界面刷新间隔
 
         # assets
         self.imports()
 
         # 鼠标指针
-        surf = pygame.image.load('../graphics/cursors/mouse.png').convert_alpha()
-        cursor = pygame.cursors.Cursor((0, 0), surf)
+        cursor = pygame.cursors.Cursor((0, 0), asset_registry.acquire('cursor'))
         pygame.mouse.set_cursor(cursor)
 
         # 游戏界面状态
         self.status = GAME_STATUS['overworld']
+        self.level = None
+
+        # 固定步长模拟
+        self.time_step = 1 / SIMULATION_TICK_RATE
+        self.accumulator = 0
 
         # 游戏参数
         self.max_health = INIT_MAX_HEALTH
         self.cur_health = INIT_CUR_HEALTH
         self.coins = INIT_COINS
 
-        # user interface
-        self.ui = UI(self.display_surface)
-
-    def imports(self):  # 关卡资源导入
-        # terrain
-        self.land_tiles = import_folder_dict('../graphics/terrain/land')
-        self.water_bottom = pygame.image.load('../graphics/terrain/water/water_bottom.png').convert_alpha()
-        self.water_top_animation = import_folder('../graphics/terrain/water/animation')
-
-        # coins
-        self.gold = import_folder('../graphics/items/gold')
-        self.silver = import_folder('../graphics/items/silver')
-        self.diamond = import_folder('../graphics/items/diamond')
-        self.coin_particle = import_folder('../graphics/items/particle')
-
-        # palm trees
-        self.palms = {folder: import_folder(f'../graphics/terrain/palm/{folder}') for folder in list(walk('../graphics/terrain/palm'))[0][1]}
-
-        # enemies
-        self.spikes = pygame.image.load('../graphics/enemies/spikes/spikes.png').convert_alpha()
-        self.tooth = {folder: import_folder(f'../graphics/enemies/tooth/{folder}') for folder in list(walk('../graphics/enemies/tooth'))[0][1]}
-        self.shell = {folder: import_folder(f'../graphics/enemies/shell_left/{folder}') for folder in list(walk('../graphics/enemies/shell_left'))[0][1]}
-        self.pearl = pygame.image.load('../graphics/enemies/pearl/pearl.png').convert_alpha()
-        self.crabby = {folder: import_folder(f'../graphics/enemies/crabby/{folder}') for folder in list(walk('../graphics/enemies/crabby'))[0][1]}
-        self.pinkstar = {folder: import_folder(f'../graphics/enemies/pinkstar/{folder}') for folder in list(walk('../graphics/enemies/pinkstar'))[0][1]}
-
-        # player
-        self.player_graphics = {folder: import_folder2x(f'../graphics/player/{folder}') for folder in list(walk('../graphics/player'))[0][1]}
-
-        # player particles
-        self.player_particles = {folder: import_folder2x(f'../graphics/player_particles/{folder}') for folder in list(walk('../graphics/player_particles'))[0][1]}
-
-        # flag
-        self.flag = import_folder('../graphics/flag')
-
-        # clouds
-        self.clouds = import_folder('../graphics/clouds')
-
-        # sounds
-        self.level_sounds = {
-            'coin': pygame.mixer.Sound('../audio/level/coin/coin.wav'),
-            'hit': pygame.mixer.Sound('../audio/level/player/hit.wav'),
-            'jump': pygame.mixer.Sound('../audio/level/player/jump.wav'),
-            'attack 0': pygame.mixer.Sound('../audio/level/player/attack 0.mp3'),
-            'attack 1': pygame.mixer.Sound('../audio/level/player/attack 1.mp3'),
-            'attack 2': pygame.mixer.Sound('../audio/level/player/attack 2.mp3'),
-            'music': pygame.mixer.Sound('../audio/level/SuperHero.ogg'),
+    def imports(self):  # 声音在启动时导入，图片在进入关卡时按需导入
+        sound_names = {
+            'coin': 'coin sound',
+            'hit': 'hit sound',
+            'jump': 'jump sound',
+            'attack 0': 'attack 0 sound',
+            'attack 1': 'attack 1 sound',
+            'attack 2': 'attack 2 sound',
         }
+        sounds = asset_registry.acquire_group(sound_names.values(), progress=self.show_loading)
+        self.level_sounds = {key: sounds[name] for key, name in sound_names.items()}
+
+        self.common_assets = None  # 各关卡通用的资源
+        self.level_asset_names = []  # 当前关卡持有的资源
+
+    # 只获取关卡中出现的tile需要的资源，已加载的直接复用，后台已解码的资源只需convert
+    def load_level_assets(self, plan):
+        self.level_asset_names = plan['asset names']
+        assets = asset_registry.acquire_group(self.level_asset_names, progress=self.show_loading, loader=plan['loader'])
+        if self.common_assets is None:  # 通用资源多持有一份引用，关卡之间不释放
+            self.common_assets = asset_registry.acquire_group(LEVEL_COMMON_ASSETS)
+        return assets
+
+    # 关卡结束后释放只有该关卡使用的资源
+    def release_level_assets(self):
+        asset_registry.release(*self.level_asset_names)
+        self.level_asset_names = []
+
+    # 加载界面
+    def show_loading(self, progress):
+        pygame.event.pump()  # 保持窗口响应
+        self.loading_timer.update()
+        if self.loading_timer.active and progress < 1:
+            return
+        self.loading_timer.activate()
+        self.ui.show_loading(progress)
+        pygame.display.update()
 
     def create_level(self, current_level):
-        with open(f'../level_data/data{current_level}', 'rb') as data:
-            grid = pickle.load(data)
+        plan = self.preloader.get(current_level)
         self.level = Level(
-            grid,
-            {
-                'land': self.land_tiles,
-                'water bottom': self.water_bottom,
-                'water top': self.water_top_animation,
-                'gold': self.gold,
-                'silver': self.silver,
-                'diamond': self.diamond,
-                'coin particle': self.coin_particle,
-                'palms': self.palms,
-                'spikes': self.spikes,
-                'tooth': self.tooth,
-                'shell': self.shell,
-                'player': self.player_graphics,
-                'player particles': self.player_particles,
-                'flag': self.flag,
-                'pearl': self.pearl,
-                'crabby': self.crabby,
-                'pinkstar': self.pinkstar,
-                'clouds': self.clouds
-            },
+            plan['grid'],
+            self.load_level_assets(plan),
             self.level_sounds,
             self.change_coins,
             self.change_health,
@@ -118,15 +100,22 @@ class LevelLauncher:
             self.set_cur_health,
             current_level,
             self.lose,
-            self.create_overworld
+            self.create_overworld,
+            plan['cooked']
         )
         self.status = current_level + 1
+        self.accumulator = 0
 
     def create_overworld(self, current_level, new_max_level):
+        if self.level is None:  # 已经返回overworld
+            return
         if new_max_level > self.max_level:
             self.max_level = new_max_level
-        self.overworld = Overworld(current_level, self.max_level, self.display_surface, self.create_level)
         self.status = GAME_STATUS['overworld']
+        self.level.close()
+        self.level = None
+        self.release_level_assets()  # 先释放，overworld重置时预加载的关卡才能正确判断缺少的资源
+        self.overworld.reset(current_level, self.max_level)
 
     # 函数传递
     def change_coins(self, amount):
@@ -157,19 +146,34 @@ class LevelLauncher:
         while True:
             if self.status == GAME_STATUS['overworld']:
                 self.clock.tick(60)
-
-                self.display_surface.fill('grey')
-                self.overworld.run()
+                dirty_rects = self.overworld.run()
+            elif not self.level.built:
+                # 关卡分帧构建，期间显示加载进度
+                self.clock.tick(RENDER_FPS)
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        pygame.quit()
+                        sys.exit()
+                self.level.build(LEVEL_BUILD_BUDGET)
+                self.ui.show_loading(self.level.build_progress)
+                dirty_rects = None
             else:
-                dt = self.clock.tick() / 1000
-                # 运行关卡逻辑
-                self.level.run(dt)
-                # 显示ui
-                self.ui.show_health(self.cur_health, self.max_health)
-                self.ui.show_coins(self.coins)
-
-            # 更新画面
-            pygame.display.update()
+                self.accumulator += min(self.clock.tick(RENDER_FPS) / 1000, MAX_FRAME_TIME)
+                # 以固定步长运行关卡逻辑
+                while self.accumulator >= self.time_step and self.status != GAME_STATUS['overworld']:
+                    self.level.update(self.time_step)
+                    self.accumulator -= self.time_step
+                # 在两次逻辑更新之间插值绘制
+                if self.level is not None:
+                    self.level.draw(self.accumulator / self.time_step)
+                    # 显示ui
+                    self.ui.show_health(self.cur_health, self.max_health)
+                    self.ui.show_coins(self.coins)
+                dirty_rects = None
+
+            music_player.update()
+            # 更新画面，overworld只更新变化的区域
+            pygame.display.update(dirty_rects)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,67 @@
+import pygame
+
+from settings import *
+
+
+# 动画帧集合：加载时生成两个朝向的帧（所有实例共享），并为每一帧预先计算遮罩和包围盒
+class AnimationFrames:
+    def __init__(self, animations, orientation):
+        self.animations = animations  # {status: [surface]}
+        self.orientation = orientation  # 素材本身的朝向
+        flipped_orientation = 'left' if orientation == 'right' else 'right'
+        self.frames = {
+            orientation: animations,
+            flipped_orientation: {status: [pygame.transform.flip(surf, True, False) for surf in frames] for status, frames in animations.items()}
+        }
+        self.masks = {}  # (status, frame, orientation) -> mask
+        self.hitboxes = {}  # (status, frame, orientation) -> 包围盒
+        self.flashes = {}  # (status, frame, orientation) -> 受击白色剪影，首次使用时生成
+
+        for side, side_animations in self.frames.items():
+            for status, frames in side_animations.items():
+                for index, image in enumerate(frames):
+                    mask = pygame.mask.from_surface(image)
+                    bounding_rects = mask.get_bounding_rects()
+                    self.masks[(status, index, side)] = mask
+                    self.hitboxes[(status, index, side)] = bounding_rects[0] if bounding_rects else image.get_rect()
+
+    def __getitem__(self, status):
+        return self.animations[status]
+
+    def get_frames(self, status, orientation):
+        return self.frames[orientation][status]
+
+    def mask(self, status, index, orientation):
+        return self.masks[(status, index, orientation)]
+
+    # 返回副本，调用者会移动hitbox
+    def hitbox(self, status, index, orientation):
+        return self.hitboxes[(status, index, orientation)].copy()
+
+    def flash(self, status, index, orientation):
+        key = (status, index, orientation)
+        if key not in self.flashes:
+            surf = self.masks[key].to_surface().convert()
+            surf.set_colorkey('black')
+            self.flashes[key] = surf
+        return self.flashes[key]
+
+
+# 全局动画时钟：循环播放的环境动画按统一节奏切换帧，每帧每种长度只计算一次帧索引
+class AnimationClock:
+    def __init__(self):
+        self.time = 0
+        self.indices = {}  # 动画长度 -> 当前帧索引
+
+    def update(self, dt):
+        self.time += dt
+        self.indices.clear()
+
+    def frame(self, frames):
+        length = len(frames)
+        if length not in self.indices:
+            self.indices[length] = int(self.time * ANIMATION_SPEED) % length
+        return frames[self.indices[length]]
+
+
+animation_clock = AnimationClock()
@@ -0,0 +1,52 @@
+import os
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from collision_map import patrol_span, terrain_bitmap, terrain_rects
+from level_format import load_level, write_level
+from settings import *
+
+
+# 预先计算关卡运行时需要的数据：地形位图、合并后的碰撞矩形、关卡范围和按类型分组的生成点
+def cook_level(grid):
+    left, top, cols, rows, tiles = terrain_bitmap(grid['terrain'], TILE_SIZE)
+    rects = terrain_rects(left, top, cols, rows, tiles, TILE_SIZE)
+    xs = [x for x, _ in grid['terrain']]
+    ys = [y for _, y in grid['terrain']]
+
+    spawns = {}  # tile id -> [x, y, ...]，地形和水以外的所有物体
+    patrol_spans = []  # [x, y, min_x, max_x, ...]，会巡逻的敌人
+    for layer_name, layer in grid.items():
+        if layer_name not in ('terrain', 'water'):
+            for (x, y), tile_id in layer.items():
+                spawns.setdefault(tile_id, []).extend((x, y))
+                span = patrol_span(left, top, cols, rows, tiles, TILE_SIZE, (x, y)) if tile_id in PATROL_TILES else None
+                if span:
+                    patrol_spans.extend((x, y, *span))
+
+    return {
+        'solid grid': array('i', (left, top, cols, rows)),
+        'solid tiles': array('B', tiles),
+        'terrain rects': array('i', [value for rect in rects for value in rect]),
+        'bounds': array('i', (min(xs), max(xs), min(ys), max(ys))),
+        'patrol spans': array('i', patrol_spans),
+        'spawns': array('i', [value for tile_id in sorted(spawns) for value in (tile_id, len(spawns[tile_id]) // 2, *spawns[tile_id])]),
+    }
+
+
+def bake_level(path):
+    grid, _ = load_level(path, cooked=False)
+    write_level(f'{path}.cooked', grid, cook_level(grid))
+    return f'{path}.cooked'
+
+
+# 烘焙关卡：python bake.py [关卡文件 ...]，默认烘焙 level_data 中的所有关卡
+if __name__ == '__main__':
+    paths = sys.argv[1:] or sorted({
+        f'../level_data/{name.removesuffix(".lvl")}' for name in os.listdir('../level_data')
+        if name.startswith('data') and ('.' not in name or name.endswith('.lvl'))
+    })
+    with ProcessPoolExecutor() as pool:
+        for cooked_path in pool.map(bake_level, paths):
+            print(cooked_path)
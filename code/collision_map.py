@@ -0,0 +1,156 @@
+import pygame
+
+from settings import *
+from spatial_hash import SpatialHash
+
+
+# 把相连的实心格子合并为尽量少的矩形：先合并每一行的连续格子，再把上下宽度相同的行段合并
+def merge_tiles(tiles, cols, rows):
+    merged = []  # [col, row, width, height]
+    previous_runs = {}  # 上一行的行段 (start, end) -> merged中的矩形
+    for row in range(rows):
+        runs = {}
+        col = 0
+        while col < cols:
+            if tiles[row * cols + col]:
+                start = col
+                while col < cols and tiles[row * cols + col]:
+                    col += 1
+                rect = previous_runs.get((start, col))
+                if rect is not None:
+                    rect[3] += 1
+                else:
+                    rect = [start, row, col - start, 1]
+                    merged.append(rect)
+                runs[(start, col)] = rect
+            col += 1
+        previous_runs = runs
+    return merged
+
+
+# 地形占用位图，返回 (left, top, cols, rows, tiles)，tiles 每个格子一个字节
+def terrain_bitmap(terrain, tile_size):
+    cells = [(x // tile_size, y // tile_size) for x, y in terrain]
+    left = min((col for col, _ in cells), default=0)
+    top = min((row for _, row in cells), default=0)
+    cols = max((col for col, _ in cells), default=-1) - left + 1
+    rows = max((row for _, row in cells), default=-1) - top + 1
+
+    tiles = bytearray(cols * rows)
+    for col, row in cells:
+        tiles[(row - top) * cols + col - left] = 1
+    return left, top, cols, rows, tiles
+
+
+# 合并后的地形碰撞矩形（像素坐标）
+def terrain_rects(left, top, cols, rows, tiles, tile_size):
+    return [
+        pygame.Rect((left + col) * tile_size, (top + row) * tile_size, width * tile_size, height * tile_size)
+        for col, row, width, height in merge_tiles(tiles, cols, rows)
+    ]
+
+
+# 站在pos所在格子上的敌人可以巡逻的区间 (min_x, max_x)：脚下连续有地面、身前没有墙的范围
+# 脚下没有地形时返回None
+def patrol_span(left, top, cols, rows, tiles, tile_size, pos):
+    col = pos[0] // tile_size - left
+    row = pos[1] // tile_size - top
+
+    def walkable(col):
+        return 0 <= col < cols and 0 <= row + 1 < rows and tiles[(row + 1) * cols + col] and not (0 <= row < rows and tiles[row * cols + col])
+
+    if not walkable(col):
+        return None
+    start = end = col
+    while walkable(start - 1):
+        start -= 1
+    while walkable(end + 1):
+        end += 1
+    return (left + start) * tile_size, (left + end + 1) * tile_size
+
+
+# 地形占用位图：每个格子一个字节，点和矩形的实心检测只需查表
+# 非地形碰撞体（棕榈树平台、贝壳）数量少，保存在带空间索引的精灵组中
+# 有烘焙数据（bake.py）时直接使用其中的位图和合并矩形
+class CollisionMap:
+    def __init__(self, terrain, collision_sprites, tile_size=TILE_SIZE, cooked=None):
+        self.tile_size = tile_size
+        self.collision_sprites = collision_sprites
+
+        if cooked:
+            self.left, self.top, self.cols, self.rows = cooked['solid grid']
+            self.tiles = cooked['solid tiles']
+            rects = cooked['terrain rects']
+            self.terrain_rects = [pygame.Rect(*rects[i:i + 4]) for i in range(0, len(rects), 4)]
+            spans = cooked.get('patrol spans', ())
+            self.patrol_spans = {(spans[i], spans[i + 1]): (spans[i + 2], spans[i + 3]) for i in range(0, len(spans), 4)}
+        else:
+            self.left, self.top, self.cols, self.rows, self.tiles = terrain_bitmap(terrain, tile_size)
+            # 合并后的地形碰撞矩形，用于玩家的碰撞修正
+            self.terrain_rects = terrain_rects(self.left, self.top, self.cols, self.rows, self.tiles, tile_size)
+            self.patrol_spans = {}
+        self.terrain_index = SpatialHash()
+        for index, rect in enumerate(self.terrain_rects):
+            self.terrain_index.insert(index, rect)
+
+    def solid_tile(self, col, row):
+        col -= self.left
+        row -= self.top
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return self.tiles[row * self.cols + col] == 1
+        return False
+
+    def solid_point(self, point):
+        x, y = int(point[0]), int(point[1])
+        if self.solid_tile(x // self.tile_size, y // self.tile_size):
+            return True
+        return self.obstacle_point((x, y))
+
+    # 只检测非地形碰撞体
+    def obstacle_point(self, point):
+        x, y = int(point[0]), int(point[1])
+        return any(sprite.rect.collidepoint(x, y) for sprite in self.collision_sprites.query(pygame.Rect(x, y, 1, 1)))
+
+    # 在pos生成的敌人的巡逻区间，优先使用烘焙数据
+    def patrol_span(self, pos):
+        pos = (int(pos[0]), int(pos[1]))
+        span = self.patrol_spans.get(pos) or patrol_span(self.left, self.top, self.cols, self.rows, self.tiles, self.tile_size, pos)
+        if span is None:  # 站在棕榈树平台等碰撞体上
+            point = (pos[0] + self.tile_size // 2, pos[1] + self.tile_size + 10)
+            for sprite in self.collision_sprites.query(pygame.Rect(point, (1, 1))):
+                if sprite.rect.collidepoint(point):
+                    return sprite.rect.left, sprite.rect.right
+            return pos[0], pos[0] + self.tile_size
+        return span
+
+    # 在巡逻区间内水平移动distance：越过区间端点或碰到动态碰撞体（贝壳、棕榈树平台）时停在边缘并掉头
+    # 返回 (新的x, 方向)
+    def patrol(self, x, width, y, direction, distance, span):
+        min_x, max_x = span
+        if direction > 0:
+            x += distance
+            if x + width > max_x:
+                return max_x - width, -1
+            if self.obstacle_point((x + width, y)):
+                return x, -1
+        else:
+            x -= distance
+            if x < min_x:
+                return min_x, 1
+            if self.obstacle_point((x - 1, y)):
+                return x, 1
+        return x, direction
+
+    def solid_rect(self, rect):
+        size = self.tile_size
+        for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+            for col in range(rect.left // size, (rect.right - 1) // size + 1):
+                if self.solid_tile(col, row):
+                    return True
+        return any(sprite.rect.colliderect(rect) for sprite in self.collision_sprites.query(rect))
+
+    # 与矩形重叠的所有碰撞矩形（合并后的地形矩形和其他碰撞体）
+    def colliding_rects(self, rect):
+        rects = [self.terrain_rects[index] for index in sorted(self.terrain_index.query(rect)) if self.terrain_rects[index].colliderect(rect)]
+        rects.extend(sprite.rect for sprite in self.collision_sprites.ordered_query(rect) if sprite.rect.colliderect(rect))
+        return rects
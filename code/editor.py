@@ -1,4 +1,3 @@
-import pickle
 import sys
 from random import choice, randint
 
@@ -7,7 +6,10 @@ from pygame.math import Vector2 as vector
 from pygame.mouse import get_pos as mouse_pos
 from pygame.mouse import get_pressed as mouse_buttons
 
+from level_format import write_level
 from menu import Menu
+from music import music_player
+from registry import asset_registry
 from settings import *
 from support import *
 from timer import Timer
@@ -21,12 +23,12 @@ class Editor:
         self.canvas_data = {}
 
         # imports
-        self.land_tiles = import_folder_dict('../graphics/terrain/land')
+        self.land_tiles = asset_registry.acquire('land')
         self.imports()
 
         # clouds
         self.current_clouds = []
-        self.cloud_surf = import_folder('../graphics/clouds')
+        self.cloud_surf = asset_registry.acquire('clouds')
         self.cloud_timer = pygame.USEREVENT + 1
         pygame.time.set_timer(self.cloud_timer, 2000)
         self.startup_clouds()
@@ -74,9 +76,7 @@ class Editor:
         )
 
         # music
-        self.editor_music = pygame.mixer.Sound('../audio/editor/Explorer.ogg')
-        self.editor_music.set_volume(0.01)  # 音量
-        self.editor_music.play(loops=-1)
+        music_player.play('editor')
 
     # support
     # 获取当前块坐标
@@ -119,14 +119,16 @@ class Editor:
 
     # 资源导入
     def imports(self):
-        self.water_bottom = load('../graphics/terrain/water/water_bottom.png').convert_alpha()
-        self.sky_handle_surf = load('../graphics/cursors/handle.png').convert_alpha()
+        self.water_bottom = asset_registry.acquire('water bottom')
+        self.sky_handle_surf = asset_registry.acquire('sky handle')
 
         # animations
         self.animations = {}
+        graphics_names = [value['graphics'] for value in EDITOR_DATA.values() if value['graphics']]
+        editor_graphics = asset_registry.acquire_group(graphics_names)
         for key, value in EDITOR_DATA.items():
             if value['graphics']:
-                graphics = import_folder(value['graphics'])
+                graphics = editor_graphics[value['graphics']]
                 self.animations[key] = {
                     'frame index': 0,
                     'frames': graphics,
@@ -209,8 +211,7 @@ class Editor:
 
     @staticmethod
     def save_grid(grid):
-        with open('../level_data/data', 'wb') as data:
-            pickle.dump(grid, data)
+        write_level('../level_data/data.lvl', grid)
 
     # input
     def event_loop(self):
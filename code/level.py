@@ -4,6 +4,11 @@ import pygame
 
 from level_data import *
 from sprites import *
+from spatial_hash import SpatialGroup
+from collision_map import CollisionMap
+from streaming import ChunkStreamer
+from animation import animation_clock
+from music import music_player
 from support import *
 from tooth import Tooth
 from crabby import Crabby
@@ -11,7 +16,7 @@ from pinkstar import Pinkstar
 
 
 class Level:
-    def __init__(self, grid, asset_dict, audio, change_coins, change_health, get_max_health, set_max_health, get_cur_health, set_cur_health, current_level, lose, create_overworld):
+    def __init__(self, grid, asset_dict, audio, change_coins, change_health, get_max_health, set_max_health, get_cur_health, set_cur_health, current_level, lose, create_overworld, cooked=None):
 
         self.display_surface = pygame.display.get_surface()
 
@@ -21,18 +26,16 @@ class Level:
 
         # groups
         self.all_sprites = CameraGroup()
-        self.coin_sprites = pygame.sprite.Group()
-        self.damage_sprites = pygame.sprite.Group()
-        self.collision_sprites = pygame.sprite.Group()
+        self.coin_sprites = SpatialGroup()
+        self.damage_sprites = SpatialGroup(rect_attr='hitbox')
+        self.collision_sprites = SpatialGroup()  # 非地形碰撞体（棕榈树平台、贝壳）
         self.shell_sprites = pygame.sprite.Group()
         self.crabby_sprites = pygame.sprite.Group()
         self.pinkstar_sprites = pygame.sprite.Group()
-        self.attackable_sprites = pygame.sprite.Group()
+        self.attackable_sprites = SpatialGroup(rect_attr='hitbox')
 
         # sounds
-        self.bg_music = audio['music']
-        self.bg_music.set_volume(0.01)
-        self.bg_music.play(loops=-1)
+        music_player.play('level')
 
         self.coin_sound = audio['coin']
         self.coin_sound.set_volume(0.3)
@@ -43,7 +46,15 @@ class Level:
         self.jump_sound = audio['jump']
         self.jump_sound.set_volume(0.3)
 
-        self.build_level(
+        # collision
+        self.collision_map = CollisionMap(grid['terrain'], self.collision_sprites, cooked=cooked)
+
+        # 关卡分多帧构建，构建完成前由launcher显示加载界面
+        self.built = False
+        self.build_progress = 0
+        self.streamer = None
+        self.closed = False
+        self.build_job = self.build_level(
             grid=grid,
             asset_dict=asset_dict,
             hit_sound=self.hit_sound,
@@ -52,9 +63,14 @@ class Level:
         )
 
         # level limits
+        if cooked:
+            min_x, max_x, _, _ = cooked['bounds']
+        else:
+            min_x = min(grid['terrain'].keys(), key=lambda pos: pos[0])[0]
+            max_x = max(grid['terrain'].keys(), key=lambda pos: pos[0])[0]
         self.level_limits = {
-            'left': min(grid['terrain'].keys(), key=lambda pos: pos[0])[0] - 1000,
-            'right': max(grid['terrain'].keys(), key=lambda pos: pos[0])[0] + 500
+            'left': min_x - 1000,
+            'right': max_x + 500
         }
 
         # player particles
@@ -66,8 +82,6 @@ class Level:
         self.coin_particle_surfs = asset_dict['coin particle']
         self.cloud_surfs = asset_dict['clouds']
         self.cloud_timer = pygame.USEREVENT + 2
-        pygame.time.set_timer(self.cloud_timer, 2000)  # 每2秒触发一次创建云事件
-        self.startup_cloud()
 
         # timer
         self.invul_timer = Timer(500)
@@ -85,17 +99,38 @@ class Level:
         # switch
         self.create_overworld = create_overworld
 
+    # 地形、水底和尖刺不会变化，加载时烘焙到大块surface上，每帧只需绘制可见的块
+    def static_tiles(self, grid, asset_dict):
+        return {
+            LEVEL_LAYERS['water']: [(asset_dict['water bottom'], pos) for pos, data in grid['water'].items() if data != 'top'],
+            LEVEL_LAYERS['main']: [(asset_dict['land'][data], pos) for pos, data in grid['terrain'].items()] + [(asset_dict['spikes'], pos) for pos, data in grid['enemies'].items() if data == 7]
+        }
+
+    def bake_static_tiles(self, grid, asset_dict):
+        for z, tiles in self.static_tiles(grid, asset_dict).items():
+            for pos, surf in bake_chunks(tiles, CHUNK_SIZE * TILE_SIZE):
+                Generic(pos, surf, self.all_sprites, z)
+                yield
+
+    # 生成器，每创建一个tile返回一次构建进度，由 build 按时间预算分帧执行
     def build_level(self, grid, asset_dict, hit_sound, jump_sound, attack_sounds):
+        self.asset_dict = asset_dict
+        total = sum(len(layer) for layer in grid.values())
+        if LEVEL_STREAMING:
+            # 按块加载时只创建玩家、天空和旗帜，其余物体交给streamer在摄像机附近生成
+            self.streamer = ChunkStreamer(
+                chunk_size=CHUNK_SIZE * TILE_SIZE,
+                static_tiles=self.static_tiles(grid, asset_dict),
+                place_static=self.place_static_chunk,
+                spawn=self.spawn_tile
+            )
+            self.all_sprites.reserve_order(total)
+        else:
+            for _ in self.bake_static_tiles(grid, asset_dict):
+                yield 0
+        done = 0
         for layer_name, layer in grid.items():
             for pos, data in layer.items():
-                if layer_name == 'terrain':
-                    Generic(pos, asset_dict['land'][data], [self.all_sprites, self.collision_sprites])
-                if layer_name == 'water':
-                    if data == 'top':
-                        Animated(asset_dict['water top'], pos, self.all_sprites, LEVEL_LAYERS['water'])
-                    else:
-                        Generic(pos, asset_dict['water bottom'], self.all_sprites, LEVEL_LAYERS['water'])
-
                 match data:
                     # player
                     case 0:
@@ -104,7 +139,7 @@ class Level:
                             assets=asset_dict['player'],
                             particles=asset_dict['player particles'],
                             group=self.all_sprites,
-                            collision_sprites=self.collision_sprites,
+                            collision_map=self.collision_map,
                             attackable_sprites=self.attackable_sprites,
                             hit_sound=hit_sound,
                             jump_sound=jump_sound,
@@ -114,113 +149,180 @@ class Level:
                     case 1:
                         self.horizon_y = pos[1]
                         self.all_sprites.horizon_y = pos[1]
-                    # coins
-                    case 4:
-                        Coin('gold', asset_dict['gold'], pos, [self.all_sprites, self.coin_sprites])
-                    case 5:
-                        Coin('silver', asset_dict['silver'], pos, [self.all_sprites, self.coin_sprites])
-                    case 6:
-                        Coin('diamond', asset_dict['diamond'], pos, [self.all_sprites, self.coin_sprites])
-                    # enemies
-                    case 7:
-                        Spikes(
-                            surf=asset_dict['spikes'],
-                            pos=pos,
-                            group=[self.all_sprites, self.damage_sprites]
-                        )
-                    case 8:
-                        Tooth(
-                            assets=asset_dict['tooth'],
-                            pos=pos,
-                            group=[self.all_sprites, self.damage_sprites, self.attackable_sprites],
-                            collision_sprites=self.collision_sprites
-                        )
-                    case 9:
-                        Shell(
-                            orientation='left',
-                            assets=asset_dict['shell'],
-                            pos=pos,
-                            group=[self.all_sprites, self.collision_sprites, self.shell_sprites],
-                            pearl_surf=asset_dict['pearl'],
-                            damage_sprites=self.damage_sprites
-                        )
-                    case 10:
-                        Shell(
-                            orientation='right',
-                            assets=asset_dict['shell'],
-                            pos=pos,
-                            group=[self.all_sprites, self.collision_sprites, self.shell_sprites],
-                            pearl_surf=asset_dict['pearl'],
-                            damage_sprites=self.damage_sprites
-                        )
-                    case 11:
-                        Crabby(
-                            assets=asset_dict['crabby'],
-                            pos=pos,
-                            group=[self.all_sprites, self.damage_sprites, self.attackable_sprites, self.crabby_sprites],
-                            collision_sprites=self.collision_sprites
-                        )
-                    case 12:
-                        Pinkstar(
-                            assets=asset_dict['pinkstar'],
-                            pos=pos,
-                            group=[self.all_sprites, self.damage_sprites, self.attackable_sprites, self.pinkstar_sprites],
-                            collision_sprites=self.collision_sprites
-                        )
-                    # palm trees fg
-                    case 13:
-                        Animated(asset_dict['palms']['small_fg'], pos, self.all_sprites)
-                        Block(pos, (76, 50), self.collision_sprites)
-                    case 14:
-                        Animated(asset_dict['palms']['large_fg'], pos, self.all_sprites)
-                        Block(pos, (76, 50), self.collision_sprites)
-                    case 15:
-                        Animated(asset_dict['palms']['left_fg'], pos, self.all_sprites)
-                        Block(pos, (76, 50), self.collision_sprites)
-                    case 16:
-                        Animated(asset_dict['palms']['right_fg'], pos, self.all_sprites)
-                        Block(pos + vector(50, 0), (76, 50), self.collision_sprites)
-                    # palm trees bg
-                    case 17:
-                        Animated(asset_dict['palms']['small_bg'], pos, self.all_sprites, LEVEL_LAYERS['bg'])
-                    case 18:
-                        Animated(asset_dict['palms']['large_bg'], pos, self.all_sprites, LEVEL_LAYERS['bg'])
-                    case 19:
-                        Animated(asset_dict['palms']['left_bg'], pos, self.all_sprites, LEVEL_LAYERS['bg'])
-                    case 20:
-                        Animated(asset_dict['palms']['right_bg'], pos, self.all_sprites, LEVEL_LAYERS['bg'])
                     # flag
                     case 21:
                         self.flag = Flag(asset_dict['flag'], pos, self.all_sprites)
-
-        for sprite in self.shell_sprites:  # 用于贝壳检测与玩家的距离
-            sprite.player = self.player
-        for sprite in self.crabby_sprites:
-            sprite.player = self.player
-        for sprite in self.pinkstar_sprites:
-            sprite.player = self.player
+                    case _:
+                        if layer_name == 'terrain' or (layer_name == 'water' and data != 'top'):
+                            pass
+                        elif self.streamer:
+                            self.streamer.add(pos, layer_name, pos, data, done, first=data in COLLIDER_TILES)
+                        else:
+                            self.create_tile(layer_name, pos, data)
+
+                if self.streamer and data in (0, 21):
+                    self.all_sprites.set_order(self.player if data == 0 else self.flag, done)
+                done += 1
+                yield done / total
+
+        if self.streamer:
+            self.streamer.update(self.view_rect())
+        else:
+            self.link_player(self.all_sprites.sprites())
+
+    # 创建一个tile上的物体，返回创建的精灵
+    def create_tile(self, layer_name, pos, data):
+        asset_dict = self.asset_dict
+        if layer_name == 'water':
+            return [Animated(asset_dict['water top'], pos, self.all_sprites, LEVEL_LAYERS['water'])]
+
+        match data:
+            # coins
+            case 4:
+                return [Coin('gold', asset_dict['gold'], pos, [self.all_sprites, self.coin_sprites])]
+            case 5:
+                return [Coin('silver', asset_dict['silver'], pos, [self.all_sprites, self.coin_sprites])]
+            case 6:
+                return [Coin('diamond', asset_dict['diamond'], pos, [self.all_sprites, self.coin_sprites])]
+            # enemies
+            case 7:
+                return [Spikes(
+                    surf=asset_dict['spikes'],
+                    pos=pos,
+                    group=self.damage_sprites  # 图像已烘焙，只保留伤害判定
+                )]
+            case 8:
+                return [Tooth(
+                    assets=asset_dict['tooth'],
+                    pos=pos,
+                    group=[self.all_sprites, self.damage_sprites, self.attackable_sprites],
+                    collision_map=self.collision_map,
+                    hit_sound=asset_dict['tooth hit sound']
+                )]
+            case 9:
+                sprites = [Shell(
+                    orientation='left',
+                    assets=asset_dict['shell'],
+                    pos=pos,
+                    group=[self.all_sprites, self.collision_sprites, self.shell_sprites],
+                    pearl_surf=asset_dict['pearl'],
+                    damage_sprites=self.damage_sprites
+                )]
+            case 10:
+                sprites = [Shell(
+                    orientation='right',
+                    assets=asset_dict['shell'],
+                    pos=pos,
+                    group=[self.all_sprites, self.collision_sprites, self.shell_sprites],
+                    pearl_surf=asset_dict['pearl'],
+                    damage_sprites=self.damage_sprites
+                )]
+            case 11:
+                sprites = [Crabby(
+                    assets=asset_dict['crabby'],
+                    pos=pos,
+                    group=[self.all_sprites, self.damage_sprites, self.attackable_sprites, self.crabby_sprites],
+                    collision_map=self.collision_map
+                )]
+            case 12:
+                sprites = [Pinkstar(
+                    assets=asset_dict['pinkstar'],
+                    pos=pos,
+                    group=[self.all_sprites, self.damage_sprites, self.attackable_sprites, self.pinkstar_sprites],
+                    collision_map=self.collision_map
+                )]
+            # palm trees fg
+            case 13:
+                return [Animated(asset_dict['palm small_fg'], pos, self.all_sprites), Block(pos, (76, 50), self.collision_sprites)]
+            case 14:
+                return [Animated(asset_dict['palm large_fg'], pos, self.all_sprites), Block(pos, (76, 50), self.collision_sprites)]
+            case 15:
+                return [Animated(asset_dict['palm left_fg'], pos, self.all_sprites), Block(pos, (76, 50), self.collision_sprites)]
+            case 16:
+                return [Animated(asset_dict['palm right_fg'], pos, self.all_sprites), Block(pos + vector(50, 0), (76, 50), self.collision_sprites)]
+            # palm trees bg
+            case 17:
+                return [Animated(asset_dict['palm small_bg'], pos, self.all_sprites, LEVEL_LAYERS['bg'])]
+            case 18:
+                return [Animated(asset_dict['palm large_bg'], pos, self.all_sprites, LEVEL_LAYERS['bg'])]
+            case 19:
+                return [Animated(asset_dict['palm left_bg'], pos, self.all_sprites, LEVEL_LAYERS['bg'])]
+            case 20:
+                return [Animated(asset_dict['palm right_bg'], pos, self.all_sprites, LEVEL_LAYERS['bg'])]
+            case _:
+                return []
+
+        # 按块加载时玩家已经存在，直接关联；一次性构建时在构建结束后统一关联
+        if self.streamer:
+            self.link_player(sprites)
+        return sprites
+
+    # 按块加载时静态图块排在最前，生成的物体保持它在关卡数据中的绘制顺序，与一次性构建时相同
+    def place_static_chunk(self, pos, surf, z):
+        sprite = Generic(pos, surf, self.all_sprites, z)
+        self.all_sprites.set_order(sprite, -1)
+        return sprite
+
+    def spawn_tile(self, layer_name, pos, data, order):
+        sprites = self.create_tile(layer_name, pos, data)
+        for sprite in sprites:
+            self.all_sprites.set_order(sprite, order)
+        return sprites
+
+    # 贝壳、螃蟹和海星需要玩家的位置
+    def link_player(self, sprites):
+        for sprite in sprites:
+            if sprite in self.shell_sprites or sprite in self.crabby_sprites or sprite in self.pinkstar_sprites:
+                sprite.player = self.player
+
+    # 以玩家为中心的摄像机矩形（世界坐标），用于决定需要加载的块和需要更新的精灵
+    def view_rect(self):
+        view_rect = pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)
+        view_rect.center = self.player.rect.center
+        return view_rect
+
+    # 离开关卡时调用
+    def close(self):
+        self.closed = True
+        if self.streamer:
+            self.streamer.close()
+
+    # 在时间预算（毫秒）内继续构建关卡，构建完成后返回True
+    def build(self, time_budget):
+        if self.built:
+            return True
+        end_time = pygame.time.get_ticks() + time_budget
+        for progress in self.build_job:
+            self.build_progress = progress
+            if pygame.time.get_ticks() >= end_time:
+                return False
+
+        self.built = True
+        pygame.time.set_timer(self.cloud_timer, 2000)  # 每2秒触发一次创建云事件
+        self.startup_cloud()
+        return True
 
     # 玩家移动灰尘特效
     def run_dust_particles(self, player):
         mid_pos = vector(590, 343)  # 玩家中心坐标
         offset = vector(18, 0)  # x轴偏移值
         if player.status == 'run' and player.on_floor:
-            current_dust_particles = self.run_dust_particle_surfs[f'{player.status}_dust_particles']
+            current_dust_particles = self.run_dust_particle_surfs.get_frames(f'{player.status}_dust_particles', player.orientation)
             self.run_dust_frame_index += self.dust_animation_speed
             if self.run_dust_frame_index >= len(current_dust_particles):
                 self.run_dust_frame_index = 0
 
+            frame = current_dust_particles[int(self.run_dust_frame_index)]
             if player.orientation == 'right':
-                frame = current_dust_particles[int(self.run_dust_frame_index)]
                 self.display_surface.blit(frame, mid_pos - offset)
             else:
-                frame = pygame.transform.flip(current_dust_particles[int(self.run_dust_frame_index)], True, False)
                 self.display_surface.blit(frame, mid_pos + offset)
 
     # 拾取金币
     def get_coins(self):
-        collided_coins = pygame.sprite.spritecollide(self.player, self.coin_sprites, True)
+        collided_coins = [sprite for sprite in self.coin_sprites.ordered_query(self.player.rect) if sprite.rect.colliderect(self.player.rect)]
         for sprite in collided_coins:
+            sprite.kill()
             self.coin_sound.play()
             match sprite.coin_type:
                 case 'gold':
@@ -234,7 +336,7 @@ class Level:
     # 受到伤害
     def get_damage(self):
         if not self.invul_timer.active:
-            for sprite in self.damage_sprites:
+            for sprite in self.damage_sprites.ordered_query(self.player.hitbox):
                 if self.player.hitbox.colliderect(sprite.hitbox):
                     self.change_health(10)
                     self.invul_timer.activate()
@@ -242,21 +344,16 @@ class Level:
                     break
         # 受到伤害变白
         else:
-            mask = pygame.mask.from_surface(self.player.image)
-            surf = mask.to_surface()
-            surf.set_colorkey('black')
-            self.player.image = surf
+            self.player.flash()
 
     def check_win(self):
         if self.player.hitbox.colliderect(self.flag.hitbox):
             self.create_overworld(self.current_level, self.new_max_level)
-            self.bg_music.stop()
 
     def check_lose(self):
         if self.get_cur_health() <= 0:
             self.lose()
             self.create_overworld(0, 0)
-            self.bg_music.stop()
 
     def event_loop(self):
         keys = pygame.key.get_pressed()
@@ -280,7 +377,6 @@ class Level:
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.create_overworld(self.current_level, 0)
-                    self.bg_music.stop()
 
     def startup_cloud(self):
         for _ in range(40):
@@ -290,26 +386,75 @@ class Level:
             y = self.horizon_y - randint(100, 500)
             Cloud((x, y), surf, self.all_sprites, self.level_limits['left'])
 
-    def run(self, dt):
-        # update
+    # 一次模拟更新（不绘制）
+    def update(self, dt):
         self.event_loop()
-        self.all_sprites.update(dt)
+        if self.closed:  # 按Esc返回了overworld
+            return
+        view_rect = self.view_rect()
+        if self.streamer:
+            self.streamer.update(view_rect)
+        self.all_sprites.update(dt, view_rect)
         self.check_win()
+        if self.closed:  # 到达终点，同一帧不再判定失败
+            return
         self.check_lose()
+        if self.closed:
+            return
         self.get_coins()
         self.get_damage()
         self.invul_timer.update()
-        # drawing
+
+    # alpha: 当前时刻在上一次与这一次模拟更新之间的位置，用于插值绘制
+    def draw(self, alpha=1):
         self.display_surface.fill(SKY_COLOR)
-        self.all_sprites.custom_draw(self.player)
+        self.all_sprites.custom_draw(self.player, alpha)
         self.run_dust_particles(self.player)
 
 
-class CameraGroup(pygame.sprite.Group):
-    def __init__(self):
+class CameraGroup(SpatialGroup):
+    def __init__(self, culling=CAMERA_CULLING):
+        self.layer_sprites = {z: {} for z in sorted(LEVEL_LAYERS.values())}  # 按z分层的精灵（dict保持加入顺序）
+        self.active_sprites = {}  # 每帧都要更新的精灵；环境动画通过空间查询更新，静态精灵不更新
+        self.sleeping_sprites = {}  # 只在摄像机附近更新的敌人和贝壳
+        self.previous_positions = {}  # 活动精灵在本次更新前的位置，用于插值绘制
         super().__init__()
         self.display_surface = pygame.display.get_surface()
         self.offset = vector()
+        self.culling = culling
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.layer_sprites.setdefault(sprite.z, {})[sprite] = None
+        if getattr(sprite, 'sleeps', False):
+            # 休眠的精灵可能一直不更新，空间索引中使用的是构造函数设置的rect和hitbox，构造函数必须把它们放到正确位置
+            self.sleeping_sprites[sprite] = None
+        elif not getattr(sprite, 'ambient', False) and type(sprite).update is not pygame.sprite.Sprite.update:
+            self.active_sprites[sprite] = None
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        del self.layer_sprites[sprite.z][sprite]
+        self.active_sprites.pop(sprite, None)
+        self.sleeping_sprites.pop(sprite, None)
+        self.previous_positions.pop(sprite, None)
+
+    # 只更新活动精灵、摄像机附近醒着的敌人和环境动画
+    # camera_rect: 本次更新时的摄像机矩形（世界坐标），不依赖上一次绘制时的offset
+    def update(self, dt, camera_rect):
+        animation_clock.update(dt)
+        awake_sprites = [sprite for sprite in self.ordered_query(camera_rect.inflate(WAKE_MARGIN * 2, WAKE_MARGIN * 2)) if sprite in self.sleeping_sprites]
+        self.previous_positions = {sprite: sprite.rect.topleft for sprite in self.active_sprites}
+        self.previous_positions.update((sprite, sprite.rect.topleft) for sprite in awake_sprites)
+        for sprite in list(self.active_sprites):
+            sprite.update(dt)
+        for sprite in awake_sprites:
+            if sprite in self.sleeping_sprites:  # 可能在本次更新中被移除
+                sprite.update(dt)
+        activity_rect = camera_rect.inflate(ACTIVITY_MARGIN * 2, ACTIVITY_MARGIN * 2)
+        for sprite in self.query(activity_rect):
+            if getattr(sprite, 'ambient', False):
+                sprite.update(dt)
 
     def draw_horizon(self):
         horizon_pos = self.horizon_y - self.offset.y
@@ -329,20 +474,45 @@ class CameraGroup(pygame.sprite.Group):
         if horizon_pos < 0:
             self.display_surface.fill(SEA_COLOR)
 
-    def custom_draw(self, player):
-        self.offset.x = player.rect.centerx - WINDOW_WIDTH / 2
-        self.offset.y = player.rect.centery - WINDOW_HEIGHT / 2
-
-        for sprite in self:
-            if sprite.z == LEVEL_LAYERS['clouds']:
-                offset_rect = sprite.rect.copy()
-                offset_rect.center -= self.offset
-                self.display_surface.blit(sprite.image, offset_rect)
-
+    # 与摄像机矩形相交的精灵（按加入顺序）
+    def visible_sprites(self):
+        camera_rect = pygame.Rect(int(self.offset.x), int(self.offset.y), WINDOW_WIDTH, WINDOW_HEIGHT).inflate(2, 2)
+        return self.ordered_query(camera_rect)
+
+    # 本帧需要绘制的各层精灵
+    def get_layer_buckets(self):
+        if not self.culling:  # 按块加载时精灵加入的顺序与绘制顺序不同，按sprite_order排序
+            return {z: sorted(sprites, key=self.sprite_order.__getitem__) for z, sprites in self.layer_sprites.items()}
+        buckets = {z: [] for z in self.layer_sprites}
+        for sprite in self.visible_sprites():
+            buckets[sprite.z].append(sprite)
+        return buckets
+
+    # 在上一次和这一次更新的位置之间插值
+    def interpolate(self, sprite, alpha):
+        x, y = sprite.rect.topleft
+        previous = self.previous_positions.get(sprite)
+        if previous is None or alpha >= 1:
+            return x, y
+        return previous[0] + (x - previous[0]) * alpha, previous[1] + (y - previous[1]) * alpha
+
+    # 一层精灵一次批量绘制
+    def draw_layer(self, sprites, alpha):
+        offset_x, offset_y = self.offset
+        blit_sequence = []
+        for sprite in sprites:
+            x, y = self.interpolate(sprite, alpha)
+            blit_sequence.append((sprite.image, (round(x - offset_x), round(y - offset_y))))
+        self.display_surface.blits(blit_sequence, False)
+
+    def custom_draw(self, player, alpha=1):
+        x, y = self.interpolate(player, alpha)
+        self.offset.x = x + player.rect.width // 2 - WINDOW_WIDTH / 2
+        self.offset.y = y + player.rect.height // 2 - WINDOW_HEIGHT / 2
+
+        buckets = self.get_layer_buckets()
+        self.draw_layer(buckets[LEVEL_LAYERS['clouds']], alpha)
         self.draw_horizon()
-        for sprite in self:
-            for layer in LEVEL_LAYERS.values():
-                if sprite.z == layer and sprite.z != LEVEL_LAYERS['clouds']:
-                    offset_rect = sprite.rect.copy()
-                    offset_rect.center -= self.offset
-                    self.display_surface.blit(sprite.image, offset_rect)
+        for z, sprites in buckets.items():
+            if z != LEVEL_LAYERS['clouds']:
+                self.draw_layer(sprites, alpha)
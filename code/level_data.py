@@ -1,9 +1,9 @@
-level_0 = {'node_pos': (110, 400), 'content': 'this is level 0', 'unlock': 1, 'node_graphics': '../graphics/overworld/level_0', 'data_path': '../level_data/data'}
-level_1 = {'node_pos': (300, 220), 'content': 'this is level 1', 'unlock': 2, 'node_graphics': '../graphics/overworld/level_1', 'data_path': '../level_data/data'}
-level_2 = {'node_pos': (480, 610), 'content': 'this is level 2', 'unlock': 3, 'node_graphics': '../graphics/overworld/level_2', 'data_path': '../level_data/data'}
-level_3 = {'node_pos': (610, 350), 'content': 'this is level 3', 'unlock': 4, 'node_graphics': '../graphics/overworld/level_3', 'data_path': '../level_data/data'}
-level_4 = {'node_pos': (880, 210), 'content': 'this is level 4', 'unlock': 5, 'node_graphics': '../graphics/overworld/level_4', 'data_path': '../level_data/data'}
-level_5 = {'node_pos': (1050, 400), 'content': 'this is level 5', 'unlock': 5, 'node_graphics': '../graphics/overworld/level_5', 'data_path': '../level_data/data'}
+level_0 = {'node_pos': (110, 400), 'content': 'this is level 0', 'unlock': 1, 'node_graphics': 'node 0', 'data_path': '../level_data/data'}
+level_1 = {'node_pos': (300, 220), 'content': 'this is level 1', 'unlock': 2, 'node_graphics': 'node 1', 'data_path': '../level_data/data'}
+level_2 = {'node_pos': (480, 610), 'content': 'this is level 2', 'unlock': 3, 'node_graphics': 'node 2', 'data_path': '../level_data/data'}
+level_3 = {'node_pos': (610, 350), 'content': 'this is level 3', 'unlock': 4, 'node_graphics': 'node 3', 'data_path': '../level_data/data'}
+level_4 = {'node_pos': (880, 210), 'content': 'this is level 4', 'unlock': 5, 'node_graphics': 'node 4', 'data_path': '../level_data/data'}
+level_5 = {'node_pos': (1050, 400), 'content': 'this is level 5', 'unlock': 5, 'node_graphics': 'node 5', 'data_path': '../level_data/data'}
 
 levels = {
     0: level_0,
@@ -0,0 +1,187 @@
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+# 二进制关卡格式（小端）：
+#   文件头     magic, 版本, 图层数, 数值表长度
+#   数值表     每项为 类型(0整数/1字符串) + 内容，图层中的值以uint16下标引用数值表
+#   图层       名称, 数量, int32坐标数组 [x0, y0, x1, y1, ...], uint16数值下标数组
+#   数据段     （版本2）名称, array类型码, 数量, 数组；烘焙后的关卡（bake.py）在这里保存预先计算的数据
+# 数组按4字节对齐，读取时直接从mmap映射的内存中取值，不复制数据
+LEVEL_MAGIC = b'PLVL'
+LEVEL_FORMAT_VERSION = 2
+
+header_struct = struct.Struct('<4sHHI')
+int_struct = struct.Struct('<Bi')
+str_struct = struct.Struct('<BH')
+layer_struct = struct.Struct('<BI')
+section_count_struct = struct.Struct('<H')
+section_struct = struct.Struct('<BcI')
+
+
+def padding(size):
+    return -size % 4
+
+
+# 一个图层的只读映射 {(x, y): 值}，按写入顺序遍历
+class LevelLayer(Mapping):
+    def __init__(self, coords, values, value_table):
+        self.coords = coords
+        self.values_index = values
+        self.value_table = value_table
+        self.index = None  # 位置 -> 下标，第一次按位置取值时生成
+
+    def __len__(self):
+        return len(self.values_index)
+
+    def __iter__(self):
+        coords = self.coords
+        for i in range(len(self.values_index)):
+            yield coords[i * 2], coords[i * 2 + 1]
+
+    def __getitem__(self, pos):
+        if self.index is None:
+            self.index = {key: i for i, key in enumerate(self)}
+        return self.value_table[self.values_index[self.index[pos]]]
+
+    def items(self):
+        coords, value_table = self.coords, self.value_table
+        for i, value_index in enumerate(self.values_index):
+            yield (coords[i * 2], coords[i * 2 + 1]), value_table[value_index]
+
+    def values(self):
+        value_table = self.value_table
+        for value_index in self.values_index:
+            yield value_table[value_index]
+
+
+# sections: {名称: array}
+def write_level(path, grid, sections=None):
+    sections = sections or {}
+    value_table = list(dict.fromkeys(value for layer in grid.values() for value in layer.values()))
+    value_index = {value: index for index, value in enumerate(value_table)}
+
+    chunks = [header_struct.pack(LEVEL_MAGIC, LEVEL_FORMAT_VERSION, len(grid), len(value_table))]
+    for value in value_table:
+        if isinstance(value, str):
+            encoded = value.encode()
+            chunks.append(str_struct.pack(1, len(encoded)) + encoded)
+        else:
+            chunks.append(int_struct.pack(0, value))
+
+    for name, layer in grid.items():
+        encoded = name.encode()
+        chunks.append(layer_struct.pack(len(encoded), len(layer)) + encoded)
+        coords = array('i', [component for pos in layer for component in pos])
+        values = array('H', [value_index[value] for value in layer.values()])
+        if sys.byteorder == 'big':
+            coords.byteswap()
+            values.byteswap()
+        chunks.append(bytes(padding(sum(map(len, chunks)))))
+        chunks.append(coords.tobytes())
+        chunks.append(values.tobytes())
+
+    chunks.append(section_count_struct.pack(len(sections)))
+    for name, data in sections.items():
+        encoded = name.encode()
+        data = array(data.typecode, data)
+        if sys.byteorder == 'big':
+            data.byteswap()
+        chunks.append(section_struct.pack(len(encoded), data.typecode.encode(), len(data)) + encoded)
+        chunks.append(bytes(padding(sum(map(len, chunks)))))
+        chunks.append(data.tobytes())
+
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(b''.join(chunks))
+    os.replace(temp_path, path)
+
+
+def cast_array(buffer, typecode):
+    if sys.byteorder == 'little':
+        return buffer.cast(typecode)
+    data = array(typecode, buffer)
+    data.byteswap()
+    return data
+
+
+# 返回 (grid, sections)，版本1的文件没有数据段
+def read_level(path):
+    with open(path, 'rb') as file:
+        buffer = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+    magic, version, layer_count, value_count = header_struct.unpack_from(buffer)
+    if magic != LEVEL_MAGIC:
+        raise ValueError(f'{path} is not a level file')
+    if not 1 <= version <= LEVEL_FORMAT_VERSION:
+        raise ValueError(f'{path} has level format version {version}, expected {LEVEL_FORMAT_VERSION} or lower')
+    offset = header_struct.size
+
+    value_table = []
+    for _ in range(value_count):
+        if buffer[offset] == 1:
+            _, length = str_struct.unpack_from(buffer, offset)
+            offset += str_struct.size
+            value_table.append(str(buffer[offset:offset + length], 'utf-8'))
+            offset += length
+        else:
+            value_table.append(int_struct.unpack_from(buffer, offset)[1])
+            offset += int_struct.size
+
+    grid = {}
+    for _ in range(layer_count):
+        name_length, count = layer_struct.unpack_from(buffer, offset)
+        offset += layer_struct.size
+        name = str(buffer[offset:offset + name_length], 'utf-8')
+        offset += name_length
+        offset += padding(offset)
+        coords = buffer[offset:offset + count * 8]
+        offset += count * 8
+        values = buffer[offset:offset + count * 2]
+        offset += count * 2
+        grid[name] = LevelLayer(cast_array(coords, 'i'), cast_array(values, 'H'), value_table)
+
+    sections = {}
+    if version >= 2:
+        section_count, = section_count_struct.unpack_from(buffer, offset)
+        offset += section_count_struct.size
+        for _ in range(section_count):
+            name_length, typecode, count = section_struct.unpack_from(buffer, offset)
+            offset += section_struct.size
+            name = str(buffer[offset:offset + name_length], 'utf-8')
+            offset += name_length
+            offset += padding(offset)
+            typecode = typecode.decode()
+            size = count * array(typecode).itemsize
+            sections[name] = cast_array(buffer[offset:offset + size], typecode)
+            offset += size
+    return grid, sections
+
+
+def is_newer(path, other):
+    return not os.path.exists(other) or os.path.getmtime(path) >= os.path.getmtime(other)
+
+
+# 读取关卡，返回 (grid, sections)
+# 优先使用比源文件新的烘焙文件，其次是二进制格式，旧的pickle文件比二进制格式新时使用pickle文件
+def load_level(path, cooked=True):
+    if cooked and os.path.exists(f'{path}.cooked') and is_newer(f'{path}.cooked', f'{path}.lvl') and is_newer(f'{path}.cooked', path):
+        return read_level(f'{path}.cooked')
+    if os.path.exists(f'{path}.lvl') and is_newer(f'{path}.lvl', path):
+        grid, _ = read_level(f'{path}.lvl')
+        return grid, {}
+    with open(path, 'rb') as data:
+        return pickle.load(data), {}
+
+
+# 把旧的pickle关卡文件转换为二进制格式：python level_format.py [关卡文件 ...]
+if __name__ == '__main__':
+    paths = sys.argv[1:] or [f'../level_data/data{index}' for index in range(6)]
+    for path in paths:
+        with open(path, 'rb') as data:
+            write_level(f'{path}.lvl', pickle.load(data))
+        print(f'{path} -> {path}.lvl')
@@ -0,0 +1,155 @@
+import hashlib
+import mmap
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from os import walk
+
+import pygame
+
+from animation import AnimationFrames
+from settings import *
+
+
+# 解码后图片的磁盘缓存：文件名由 源路径 + 处理方式 决定，内容为 源文件修改时间 + 宽高 + RGBA原始像素
+# 源文件修改后缓存文件被原地覆盖，缓存大小不会随修改次数增长（只有删除的源文件会留下缓存，可以直接删除缓存目录）
+# 读取时用mmap映射文件直接生成surface，跳过PNG解码和缩放
+class AssetCache:
+    header = struct.Struct('<QII')
+
+    def __init__(self, directory=ASSET_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get_file(self, path, recipe):
+        key = f'{path}|{recipe}'
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.raw')
+
+    def load(self, path, recipe):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            with open(self.get_file(path, recipe), 'rb') as file:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(buffer) < self.header.size:  # 写入不完整或损坏的文件
+            return None
+        cached_mtime, width, height = self.header.unpack_from(buffer)
+        if cached_mtime != mtime or len(buffer) != self.header.size + width * height * 4:
+            return None
+        # surface直接引用映射的内存
+        return pygame.image.frombuffer(memoryview(buffer)[self.header.size:], (width, height), 'RGBA')
+
+    def save(self, path, recipe, surf):
+        cache_file = self.get_file(path, recipe)
+        temp_file = f'{cache_file}.{os.getpid()}.tmp'
+        with open(temp_file, 'wb') as file:
+            file.write(self.header.pack(os.stat(path).st_mtime_ns, *surf.get_size()))
+            file.write(pygame.image.tobytes(surf, 'RGBA'))
+        os.replace(temp_file, cache_file)  # 写完后再替换，避免读到写了一半的文件
+
+
+# 多线程资源加载：图片解码（pygame.image.load会释放GIL）和声音读取在线程池中完成，
+# convert_alpha只在主线程执行；每完成一项调用一次 progress(完成比例)
+class AssetLoader:
+    def __init__(self, progress=None, workers=ASSET_LOADER_WORKERS):
+        self.progress = progress
+        self.workers = workers
+        self.cache = AssetCache() if ASSET_CACHE else None
+        self.image_jobs = {}  # 路径 -> 是否scale2x
+        self.sound_jobs = set()
+        self.decoded = {}  # 路径 -> 解码后（尚未convert）的surface或声音
+        self.images = {}
+        self.sounds = {}
+
+    # 递归加入文件夹下的所有图片
+    def queue_folder(self, path, scale2x=False):
+        for folder_name, sub_folders, img_files in walk(path):
+            for img_name in img_files:
+                self.image_jobs[os.path.normpath(os.path.join(folder_name, img_name))] = scale2x
+
+    def queue_image(self, path, scale2x=False):
+        self.image_jobs[os.path.normpath(path)] = scale2x
+
+    def queue_sound(self, path):
+        self.sound_jobs.add(os.path.normpath(path))
+
+    def decode_image(self, path, scale2x):
+        recipe = 'scale2x' if scale2x else 'raw'
+        if self.cache is not None:
+            surf = self.cache.load(path, recipe)
+            if surf is not None:
+                return surf
+        surf = pygame.image.load(path)
+        if scale2x:
+            surf = pygame.transform.scale2x(surf)
+        if self.cache is not None:
+            self.cache.save(path, recipe, surf)
+        return surf
+
+    # 解码队列中尚未解码的资源，不涉及显示，可以在后台线程中调用
+    def decode(self, progress=None):
+        image_jobs = {path: scale2x for path, scale2x in self.image_jobs.items() if path not in self.decoded}
+        sound_jobs = [path for path in self.sound_jobs if path not in self.decoded]
+        total = len(image_jobs) + len(sound_jobs)
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = {pool.submit(self.decode_image, path, scale2x): path for path, scale2x in image_jobs.items()}
+            futures.update({pool.submit(pygame.mixer.Sound, path): path for path in sound_jobs})
+            for done, future in enumerate(as_completed(futures), start=1):
+                self.decoded[futures[future]] = future.result()
+                if progress is not None:
+                    progress(done / total)
+
+    def run(self):
+        self.decode(self.progress)
+        for path in self.image_jobs:
+            self.images[path] = self.decoded.pop(path).convert_alpha()
+        for path in self.sound_jobs:
+            self.sounds[path] = self.decoded.pop(path)
+        self.image_jobs.clear()
+        self.sound_jobs.clear()
+
+    # 按settings中的资源描述加入队列
+    def queue_asset(self, recipe):
+        if recipe['type'] == 'sound':
+            self.queue_sound(recipe['path'])
+        elif recipe['type'] == 'image':
+            self.queue_image(recipe['path'], recipe.get('scale2x', False))
+        else:
+            self.queue_folder(recipe['path'], recipe.get('scale2x', False))
+
+    def build_asset(self, recipe):
+        path, numeric = recipe['path'], recipe.get('numeric', False)
+        match recipe['type']:
+            case 'image':
+                return self.image(path)
+            case 'folder':
+                return self.folder(path, numeric)
+            case 'folder dict':
+                return self.folder_dict(path, numeric)
+            case 'animation':
+                return AnimationFrames(self.subfolders(path, numeric), recipe['orientation'])
+            case 'sound':
+                return self.sound(path)
+
+    # 读取已加载的资源，文件顺序与support中的同名函数一致
+    def image(self, path):
+        return self.images[os.path.normpath(path)]
+
+    def sound(self, path):
+        return self.sounds[os.path.normpath(path)]
+
+    @staticmethod
+    def folder_files(path, numeric=False):
+        img_files = list(walk(path))[0][2]
+        return sorted(img_files, key=lambda file_name: int(os.path.splitext(file_name)[0])) if numeric else img_files
+
+    def folder(self, path, numeric=False):
+        return [self.image(path + '/' + img_name) for img_name in self.folder_files(path, numeric)]
+
+    def folder_dict(self, path, numeric=False):
+        return {img_name.split('.')[0]: self.image(path + '/' + img_name) for img_name in self.folder_files(path, numeric)}
+
+    # {子文件夹名: 帧列表}
+    def subfolders(self, path, numeric=False):
+        return {folder: self.folder(f'{path}/{folder}', numeric) for folder in list(walk(path))[0][1]}
@@ -0,0 +1,38 @@
+import pygame
+
+from settings import *
+
+
+# 背景音乐：用pygame.mixer.music流式播放，不把整首曲子解码到内存
+# mixer.music只有一路音轨，切换时先淡出当前曲目，淡出结束后再淡入新曲目
+class MusicPlayer:
+    def __init__(self, fade_ms=MUSIC_FADE_MS):
+        self.fade_ms = fade_ms
+        self.current = None  # 正在播放（或正在淡出）的曲目
+        self.pending = None  # 等待当前曲目淡出后播放的曲目
+
+    def play(self, name):
+        if name == (self.pending or self.current):
+            return
+        if self.current is not None and pygame.mixer.music.get_busy():
+            if self.pending is None:
+                pygame.mixer.music.fadeout(self.fade_ms)
+            self.pending = name
+        else:
+            self.start(name)
+
+    def start(self, name):
+        track = MUSIC_TRACKS[name]
+        pygame.mixer.music.load(track['path'])
+        pygame.mixer.music.set_volume(track['volume'])
+        pygame.mixer.music.play(loops=-1, fade_ms=self.fade_ms)
+        self.current = name
+        self.pending = None
+
+    # 每帧调用，淡出结束后开始播放下一首
+    def update(self):
+        if self.pending is not None and not pygame.mixer.music.get_busy():
+            self.start(self.pending)
+
+
+music_player = MusicPlayer()
@@ -3,83 +3,120 @@ import sys
 
 from pygame.math import Vector2 as vector
 from level_data import levels
-from support import import_folder
+from music import music_player
+from registry import asset_registry
 from settings import *
 
 
-class Node(pygame.sprite.Sprite):
-    def __init__(self, pos, status, icon_speed, path):
+class Node(pygame.sprite.DirtySprite):
+    def __init__(self, pos, status, icon_speed, frames):
         super().__init__()
-        self.frames = import_folder(path)
+        self.frames = frames
+        self.set_status(status)
+        self.rect = self.image.get_rect(center=pos)
+
+        self.detection_zone = pygame.Rect(self.rect.centerx - (icon_speed / 2), self.rect.centery - (icon_speed / 2), icon_speed, icon_speed)
+
+    def set_status(self, status):
         self.frame_index = 0
-        self.image = self.frames[self.frame_index]
+        self.dirty = 1
         if status == 'available':
             self.status = 'available'
+            self.image = self.frames[self.frame_index]
         else:
+            # 未解锁的关卡显示静止的变暗图像，只在状态改变时生成一次
             self.status = 'locked'
-        self.rect = self.image.get_rect(center=pos)
-
-        self.detection_zone = pygame.Rect(self.rect.centerx - (icon_speed / 2), self.rect.centery - (icon_speed / 2), icon_speed, icon_speed)
+            self.image = self.frames[self.frame_index].copy()  # 帧是共享的，变暗只作用于副本
+            tint_surf = self.image.copy()
+            tint_surf.fill('black', None, pygame.BLEND_RGBA_MULT)
+            self.image.blit(tint_surf, (0, 0))
 
     def animate(self):
+        previous_index = int(self.frame_index)
         self.frame_index += 0.15
         if self.frame_index >= len(self.frames):
             self.frame_index = 0
-        self.image = self.frames[int(self.frame_index)]
+        if int(self.frame_index) != previous_index:  # 帧变化时才需要重绘
+            self.image = self.frames[int(self.frame_index)]
+            self.dirty = 1
 
     def update(self):
         if self.status == 'available':
             self.animate()
-        else:
-            tint_surf = self.image.copy()
-            tint_surf.fill('black', None, pygame.BLEND_RGBA_MULT)
-            self.image.blit(tint_surf, (0, 0))
 
 
-class Icon(pygame.sprite.Sprite):
-    def __init__(self, pos):
+class Icon(pygame.sprite.DirtySprite):
+    def __init__(self, pos, surf):
         super().__init__()
         self.pos = pos
-        self.image = pygame.image.load('../graphics/overworld/hat.png').convert_alpha()
+        self.image = surf
         self.rect = self.image.get_rect(center=pos)
 
     def update(self):
-        self.rect.center = self.pos
+        rect = self.rect.copy()
+        rect.center = self.pos
+        if rect != self.rect:
+            self.rect = rect
+            self.dirty = 1
 
 
 class Overworld:
-    def __init__(self, start_level, max_level, surface, create_level):
+    def __init__(self, start_level, max_level, surface, create_level, preload_level):
         # setup
         self.display_surface = surface
         self.max_level = max_level
         self.current_level = start_level
         self.create_level = create_level
+        self.preload_level = preload_level
         # movement
         self.moving = False
         self.move_direction = vector()
         self.speed = 8
+        # assets
+        self.assets = asset_registry.acquire_group([node_data['node_graphics'] for node_data in levels.values()] + ['hat'])
         # sprites
         self.nodes = self.setup_nodes()
         self.icon = self.setup_icon()
+        # 只重绘变化的精灵，背景和路径只在解锁的关卡变化时重新绘制
+        self.visible_sprites = pygame.sprite.LayeredDirty(self.nodes.sprites(), self.icon.sprite)
+        self.visible_sprites.change_layer(self.icon.sprite, 1)
+        self.background = pygame.Surface(self.display_surface.get_size())
+        self.visible_sprites.clear(self.display_surface, self.background)
+        self.draw_background()
         # music
-        self.bg_music = pygame.mixer.Sound('../audio/overworld/overworld_music.wav')
-        self.bg_music.set_volume(0.05)
-        self.bg_music.play(loops=-1)
+        music_player.play('overworld')
+        self.preload_level(self.current_level)
+
+    # 从关卡返回时复用已有的overworld，只更新关卡状态和图标位置
+    def reset(self, current_level, max_level):
+        self.current_level = current_level
+        self.moving = False
+        self.move_direction = vector()
+        if max_level != self.max_level:
+            self.max_level = max_level
+            for index, node_sprite in enumerate(self.nodes.sprites()):
+                node_sprite.set_status('available' if index <= self.max_level else 'locked')
+            self.draw_background()
+        self.icon.sprite.pos = self.nodes.sprites()[self.current_level].rect.center
+        self.icon.update()
+        self.visible_sprites.repaint_rect(self.display_surface.get_rect())  # 从关卡返回时整屏重绘
+        music_player.play('overworld')
+        self.preload_level(self.current_level)
 
     def setup_nodes(self):
         nodes = pygame.sprite.Group()
         for index, node_data in enumerate(levels.values()):
             if index <= self.max_level:
-                node_sprite = Node(node_data['node_pos'], 'available', self.speed, node_data['node_graphics'])
+                node_sprite = Node(node_data['node_pos'], 'available', self.speed, self.assets[node_data['node_graphics']])
             else:
-                node_sprite = Node(node_data['node_pos'], 'locked', self.speed, node_data['node_graphics'])
+                node_sprite = Node(node_data['node_pos'], 'locked', self.speed, self.assets[node_data['node_graphics']])
             nodes.add(node_sprite)
 
         return nodes
 
     def setup_icon(self):
         icon = pygame.sprite.GroupSingle()
-        icon_sprite = Icon(self.nodes.sprites()[self.current_level].rect.center)
+        icon_sprite = Icon(self.nodes.sprites()[self.current_level].rect.center, self.assets['hat'])
         icon.add(icon_sprite)
 
         return icon
@@ -97,7 +134,6 @@ class Overworld:
                 self.moving = True
             elif keys[pygame.K_SPACE]:
                 self.create_level(self.current_level)
-                self.bg_music.stop()
 
     def get_move_direction(self, target):
         start = vector(self.nodes.sprites()[self.current_level].rect.center)
@@ -116,11 +152,14 @@ class Overworld:
             if target_node.detection_zone.collidepoint(self.icon.sprite.pos):
                 self.moving = False
                 self.move_direction = vector()
+                self.preload_level(self.current_level)  # 图标到达后开始在后台准备该关卡
 
-    def draw_paths(self):
+    def draw_background(self):
+        self.background.fill('grey')
         points = [point['node_pos'] for index, point in enumerate(levels.values()) if index <= self.max_level]
         if len(points) >= 2:
-            pygame.draw.lines(self.display_surface, PATH_COLOR, False, points, 6)
+            pygame.draw.lines(self.background, PATH_COLOR, False, points, 6)
+        self.visible_sprites.repaint_rect(self.display_surface.get_rect())
 
     def event_loop(self):
         for event in pygame.event.get():
@@ -134,7 +173,5 @@ class Overworld:
         self.update_icon_pos()
         self.icon.update()
         self.nodes.update()
-        # draw
-        self.draw_paths()
-        self.nodes.draw(self.display_surface)
-        self.icon.draw(self.display_surface)
+        # draw，返回需要更新到屏幕上的区域
+        return self.visible_sprites.draw(self.display_surface)
@@ -8,7 +8,9 @@ from random import choice
 
 
 class Pinkstar(sprites.Generic):
-    def __init__(self, assets, pos, group, collision_sprites):
+    sleeps = True  # 离开摄像机附近时休眠
+
+    def __init__(self, assets, pos, group, collision_map):
         # 通用设置
         self.animation_frames = assets
         self.frame_index = 0
@@ -18,15 +20,15 @@ class Pinkstar(sprites.Generic):
         surf = self.animation_frames[self.status][int(self.frame_index)]
         super().__init__(pos, surf, group)
         self.rect.bottom = self.rect.top + TILE_SIZE
-        self.mask = pygame.mask.from_surface(self.image)
-        self.hitbox = self.mask.get_bounding_rects()[0]
+        self.mask = self.animation_frames.mask(self.status, int(self.frame_index), self.orientation)
+        self.hitbox = self.animation_frames.hitbox(self.status, int(self.frame_index), self.orientation)
         self.hitbox.center = self.rect.center
         # 移动
         self.direction = vector(choice((1, -1)), 0)
         self.orientation = 'left' if self.direction.x < 0 else 'right'
         self.pos = vector(self.rect.topleft)
         self.speed = 400
-        self.collision_sprites = collision_sprites
+        self.collision_map = collision_map
         # 单位属性
         self.is_dead = False
         self.dead_ground_timer = timer.Timer(duration=3000, action=self.kill)
@@ -38,11 +40,13 @@ class Pinkstar(sprites.Generic):
         self.damage_sprites = group[1]
         self.attackable_sprites = group[2]
         # 删除不在地面的pinkstar
-        if not [sprite for sprite in collision_sprites if sprite.rect.collidepoint(self.rect.midbottom + vector(0, 10))]:
+        if not collision_map.solid_point(self.rect.midbottom + vector(0, 10)):
             self.kill()
+        self.patrol_span = collision_map.patrol_span(pos)  # 巡逻区间 (min_x, max_x)
 
     def animate(self, dt):
-        current_animation = self.animation_frames[self.status]
+        current_status = self.status  # 播放结束时状态可能切换，本帧图像仍来自当前动画
+        current_animation = self.animation_frames.get_frames(current_status, self.orientation)
         if self.frame_index >= len(current_animation):  # 动画播放到最后一帧
             if PINKSTAR_ANIMATION_STATUS[self.status]['times'] == 'once':  # 一次性动画
                 if self.status == 'dead hit':  # 死亡（打击）动画结束，转换状态为死亡（地面）
@@ -58,11 +62,13 @@ class Pinkstar(sprites.Generic):
                     self.frame_index = len(current_animation) - 1
             else:  # 循环动画
                 self.frame_index = 0
-        self.image = current_animation[int(self.frame_index)] if self.orientation == 'left' else pygame.transform.flip(current_animation[int(self.frame_index)], True, False)
+        self.image = current_animation[int(self.frame_index)]
+        if current_status == 'hit' and ENEMY_HIT_FLASH:  # 受击时显示白色剪影
+            self.image = self.animation_frames.flash(current_status, int(self.frame_index), self.orientation)
         self.rect = self.image.get_rect(midbottom=self.rect.midbottom)
         self.pos = vector(self.rect.topleft)
-        self.mask = pygame.mask.from_surface(self.image)
-        self.hitbox = self.mask.get_bounding_rects()[0]
+        self.mask = self.animation_frames.mask(current_status, int(self.frame_index), self.orientation)
+        self.hitbox = self.animation_frames.hitbox(current_status, int(self.frame_index), self.orientation)
         self.hitbox.center = self.rect.center
         self.frame_index += ANIMATION_SPEED * dt
 
@@ -83,27 +89,11 @@ class Pinkstar(sprites.Generic):
         self.attack_cooldown.activate()
 
     def attack(self, dt):
-        right_gap = self.rect.bottomright + vector(1, 1)
-        right_block = self.rect.midright + vector(1, 0)
-        left_gap = self.rect.bottomleft + vector(-1, 1)
-        left_block = self.rect.midleft + vector(-1, 0)
-        if self.direction.x > 0:  # 向右
-            # 1. 悬崖检测
-            floor_sprites = [sprite for sprite in self.collision_sprites if sprite.rect.collidepoint(right_gap)]
-            # 2. 墙壁检测
-            wall_sprites = [sprite for sprite in self.collision_sprites if sprite.rect.collidepoint(right_block)]
-            if wall_sprites or not floor_sprites:
-                self.direction.x *= -1
-                self.orientation = 'left'
-        if self.direction.x < 0:  # 向左
-            # 1. 悬崖检测
-            floor_sprites = [sprite for sprite in self.collision_sprites if sprite.rect.collidepoint(left_gap)]
-            # 2. 墙壁检测
-            wall_sprites = [sprite for sprite in self.collision_sprites if sprite.rect.collidepoint(left_block)]
-            if wall_sprites or not floor_sprites:
-                self.direction.x *= -1
-                self.orientation = 'right'
-        self.pos.x += self.direction.x * self.speed * dt
+        # 悬崖和墙壁已包含在巡逻区间中，只需检测动态碰撞体
+        direction = self.direction.x
+        self.pos.x, self.direction.x = self.collision_map.patrol(self.pos.x, self.rect.width, self.rect.centery, direction, self.speed * dt, self.patrol_span)
+        if self.direction.x != direction:
+            self.orientation = 'right' if self.direction.x > 0 else 'left'
         self.rect.x = round(self.pos.x)
         self.hitbox.center = self.rect.center
 
@@ -140,3 +130,4 @@ class Pinkstar(sprites.Generic):
             self.attack_cooldown.update()
         self.get_status()
         self.animate(dt)
+        self.reindex()
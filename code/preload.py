@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from level_format import load_level
+from registry import asset_registry
+from support import level_asset_names
+
+
+# 关卡的构建计划：关卡数据、烘焙数据、需要的资源名和已解码（尚未convert）的资源
+def prepare_level(current_level):
+    grid, cooked = load_level(f'../level_data/data{current_level}')
+    names = level_asset_names(grid, cooked)
+    loader = asset_registry.prepare(names)
+    loader.decode()
+    return {'grid': grid, 'cooked': cooked, 'asset names': names, 'loader': loader}
+
+
+# 在overworld上后台准备图标所在的关卡，进入关卡时主线程只需创建精灵
+class LevelPreloader:
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.current_level = None
+        self.future = None
+
+    def request(self, current_level):
+        if current_level != self.current_level:
+            self.current_level = current_level
+            self.future = self.executor.submit(prepare_level, current_level)
+
+    # 取出关卡的构建计划，没有预加载过则直接在主线程准备
+    def get(self, current_level):
+        future = self.future if current_level == self.current_level else None
+        self.current_level = None
+        self.future = None
+        return future.result() if future is not None else prepare_level(current_level)
@@ -0,0 +1,49 @@
+from loader import AssetLoader
+from settings import *
+
+
+# 进程内共享的资源表：按settings.ASSETS中的名称提供已转换的surface和声音
+# 每次获取引用计数加一，全部释放后丢弃资源，下次获取时重新加载（有磁盘缓存）
+class AssetRegistry:
+    def __init__(self, recipes=ASSETS):
+        self.recipes = recipes
+        self.assets = {}  # 名称 -> 资源
+        self.refs = {}  # 名称 -> 引用计数
+
+    # 为缺少的资源准备一个加载器，可以先在后台解码，再传给 acquire_group
+    def prepare(self, names):
+        loader = AssetLoader()
+        for name in dict.fromkeys(names):
+            if name not in self.assets:
+                loader.queue_asset(self.recipes[name])
+        return loader
+
+    # 获取一组资源，缺少的资源在线程池中一起加载
+    def acquire_group(self, names, progress=None, loader=None):
+        names = list(names)
+        missing = [name for name in dict.fromkeys(names) if name not in self.assets]
+        if missing:
+            loader = loader or AssetLoader()
+            loader.progress = progress
+            for name in missing:
+                loader.queue_asset(self.recipes[name])
+            loader.run()
+            for name in missing:
+                self.assets[name] = loader.build_asset(self.recipes[name])
+
+        for name in names:
+            self.refs[name] = self.refs.get(name, 0) + 1
+        return {name: self.assets[name] for name in names}
+
+    def acquire(self, name):
+        return self.acquire_group([name])[name]
+
+    def release(self, *names):
+        for name in names:
+            self.refs[name] -= 1
+            if self.refs[name] == 0:
+                del self.refs[name]
+                del self.assets[name]
+
+
+asset_registry = AssetRegistry()
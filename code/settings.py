@@ -4,38 +4,162 @@ WINDOW_WIDTH = 1280
 WINDOW_HEIGHT = 720
 ANIMATION_SPEED = 10
 
+# camera
+CAMERA_CULLING = True  # 只绘制与摄像机矩形相交的精灵
+SPATIAL_CELL_SIZE = TILE_SIZE * 4  # 空间哈希格子边长
+CHUNK_SIZE = 16  # 静态图块烘焙块的边长（格）
+ACTIVITY_MARGIN = TILE_SIZE * 2  # 摄像机外仍然更新环境动画的距离
+WAKE_MARGIN = TILE_SIZE * 4  # 摄像机外仍然更新敌人和贝壳的距离，更远的进入休眠
+
+# streaming
+LEVEL_STREAMING = True  # 按块加载关卡，只保留摄像机附近的块
+STREAM_MARGIN = CHUNK_SIZE * TILE_SIZE // 2  # 与摄像机矩形距离在此范围内的块被激活
+STREAM_KEEP_MARGIN = CHUNK_SIZE * TILE_SIZE  # 超出此范围的块被卸载，之间的块在后台预先烘焙
+
+# simulation
+SIMULATION_TICK_RATE = 60  # 关卡逻辑每秒固定更新的次数
+RENDER_FPS = 60  # 关卡画面帧率上限，0为不限制
+MAX_FRAME_TIME = 0.25  # 单帧最多计入的时间（秒），避免卡顿后一次追赶过多更新
+LEVEL_BUILD_BUDGET = 8  # 构建关卡时每帧最多占用的时间（毫秒），其余时间用于绘制加载界面
+
+# assets
+ASSET_LOADER_WORKERS = 4  # 资源解码线程数
+ASSET_CACHE = True  # 缓存解码后的像素数据
+ASSET_CACHE_DIR = '../cache'
+
+# music
+MUSIC_FADE_MS = 500  # 切换背景音乐时的淡入淡出时间
+
 # editor graphics 
 EDITOR_DATA = {
-    0: {'style': 'player', 'type': 'object', 'menu': None, 'menu_surf': None, 'preview': None, 'graphics': '../graphics/player/idle'},
+    0: {'style': 'player', 'type': 'object', 'menu': None, 'menu_surf': None, 'preview': None, 'graphics': 'editor player'},
     1: {'style': 'sky',    'type': 'object', 'menu': None, 'menu_surf': None, 'preview': None, 'graphics': None},
 
     2: {'style': 'terrain', 'type': 'tile', 'menu': 'terrain', 'menu_surf': '../graphics/menu/land.png',  'preview': '../graphics/preview/land.png',  'graphics': None},
-    3: {'style': 'water',   'type': 'tile', 'menu': 'terrain', 'menu_surf': '../graphics/menu/water.png', 'preview': '../graphics/preview/water.png', 'graphics': '../graphics/terrain/water/animation'},
-
-    4: {'style': 'coin', 'type': 'tile', 'menu': 'coin', 'menu_surf': '../graphics/menu/gold.png',    'preview': '../graphics/preview/gold.png',    'graphics': '../graphics/items/gold'},
-    5: {'style': 'coin', 'type': 'tile', 'menu': 'coin', 'menu_surf': '../graphics/menu/silver.png',  'preview': '../graphics/preview/silver.png',  'graphics': '../graphics/items/silver'},
-    6: {'style': 'coin', 'type': 'tile', 'menu': 'coin', 'menu_surf': '../graphics/menu/diamond.png', 'preview': '../graphics/preview/diamond.png', 'graphics': '../graphics/items/diamond'},
-
-    7: {'style': 'enemy', 'type': 'tile', 'menu': 'enemy', 'menu_surf': '../graphics/menu/spikes.png',      'preview': '../graphics/preview/spikes.png',      'graphics': '../graphics/enemies/spikes'},
-    8: {'style': 'enemy', 'type': 'tile', 'menu': 'enemy', 'menu_surf': '../graphics/menu/tooth.png',       'preview': '../graphics/preview/tooth.png',       'graphics': '../graphics/enemies/tooth/idle'},
-    9: {'style': 'enemy', 'type': 'tile', 'menu': 'enemy', 'menu_surf': '../graphics/menu/shell_left.png',  'preview': '../graphics/preview/shell_left.png',  'graphics': '../graphics/enemies/shell_left/idle'},
-    10: {'style': 'enemy', 'type': 'tile', 'menu': 'enemy', 'menu_surf': '../graphics/menu/shell_right.png', 'preview': '../graphics/preview/shell_right.png', 'graphics': '../graphics/enemies/shell_right/idle'},
-    11: {'style': 'enemy', 'type': 'tile', 'menu': 'enemy', 'menu_surf': '../graphics/menu/crabby.png', 'preview': '../graphics/preview/crabby.png', 'graphics': '../graphics/enemies/crabby/idle'},
-    12: {'style': 'enemy', 'type': 'tile', 'menu': 'enemy', 'menu_surf': '../graphics/menu/pinkstar.png', 'preview': '../graphics/preview/pinkstar.png', 'graphics': '../graphics/enemies/pinkstar/idle'},
-
-    13: {'style': 'palm_fg', 'type': 'object', 'menu': 'palm fg', 'menu_surf': '../graphics/menu/small_fg.png', 'preview': '../graphics/preview/small_fg.png', 'graphics': '../graphics/terrain/palm/small_fg'},
-    14: {'style': 'palm_fg', 'type': 'object', 'menu': 'palm fg', 'menu_surf': '../graphics/menu/large_fg.png', 'preview': '../graphics/preview/large_fg.png', 'graphics': '../graphics/terrain/palm/large_fg'},
-    15: {'style': 'palm_fg', 'type': 'object', 'menu': 'palm fg', 'menu_surf': '../graphics/menu/left_fg.png',  'preview': '../graphics/preview/left_fg.png',  'graphics': '../graphics/terrain/palm/left_fg'},
-    16: {'style': 'palm_fg', 'type': 'object', 'menu': 'palm fg', 'menu_surf': '../graphics/menu/right_fg.png', 'preview': '../graphics/preview/right_fg.png', 'graphics': '../graphics/terrain/palm/right_fg'},
-
-    17: {'style': 'palm_bg', 'type': 'object', 'menu': 'palm bg', 'menu_surf': '../graphics/menu/small_bg.png', 'preview': '../graphics/preview/small_bg.png', 'graphics': '../graphics/terrain/palm/small_bg'},
-    18: {'style': 'palm_bg', 'type': 'object', 'menu': 'palm bg', 'menu_surf': '../graphics/menu/large_bg.png', 'preview': '../graphics/preview/large_bg.png', 'graphics': '../graphics/terrain/palm/large_bg'},
-    19: {'style': 'palm_bg', 'type': 'object', 'menu': 'palm bg', 'menu_surf': '../graphics/menu/left_bg.png',  'preview': '../graphics/preview/left_bg.png',  'graphics': '../graphics/terrain/palm/left_bg'},
-    20: {'style': 'palm_bg', 'type': 'object', 'menu': 'palm bg', 'menu_surf': '../graphics/menu/right_bg.png', 'preview': '../graphics/preview/right_bg.png', 'graphics': '../graphics/terrain/palm/right_bg'},
-
-    21: {'style': 'flag', 'type': 'tile', 'menu': 'coin', 'menu_surf': '../graphics/menu/flag.png', 'preview': '../graphics/preview/flag.png', 'graphics': '../graphics/flag'}
+    3: {'style': 'water',   'type': 'tile', 'menu': 'terrain', 'menu_surf': '../graphics/menu/water.png', 'preview': '../graphics/preview/water.png', 'graphics': 'water top'},
+
+    4: {'style': 'coin', 'type': 'tile', 'menu': 'coin', 'menu_surf': '../graphics/menu/gold.png',    'preview': '../graphics/preview/gold.png',    'graphics': 'gold'},
+    5: {'style': 'coin', 'type': 'tile', 'menu': 'coin', 'menu_surf': '../graphics/menu/silver.png',  'preview': '../graphics/preview/silver.png',  'graphics': 'silver'},
+    6: {'style': 'coin', 'type': 'tile', 'menu': 'coin', 'menu_surf': '../graphics/menu/diamond.png', 'preview': '../graphics/preview/diamond.png', 'graphics': 'diamond'},
+
+    7: {'style': 'enemy', 'type': 'tile', 'menu': 'enemy', 'menu_surf': '../graphics/menu/spikes.png',      'preview': '../graphics/preview/spikes.png',      'graphics': 'editor spikes'},
+    8: {'style': 'enemy', 'type': 'tile', 'menu': 'enemy', 'menu_surf': '../graphics/menu/tooth.png',       'preview': '../graphics/preview/tooth.png',       'graphics': 'editor tooth'},
+    9: {'style': 'enemy', 'type': 'tile', 'menu': 'enemy', 'menu_surf': '../graphics/menu/shell_left.png',  'preview': '../graphics/preview/shell_left.png',  'graphics': 'editor shell_left'},
+    10: {'style': 'enemy', 'type': 'tile', 'menu': 'enemy', 'menu_surf': '../graphics/menu/shell_right.png', 'preview': '../graphics/preview/shell_right.png', 'graphics': 'editor shell_right'},
+    11: {'style': 'enemy', 'type': 'tile', 'menu': 'enemy', 'menu_surf': '../graphics/menu/crabby.png', 'preview': '../graphics/preview/crabby.png', 'graphics': 'editor crabby'},
+    12: {'style': 'enemy', 'type': 'tile', 'menu': 'enemy', 'menu_surf': '../graphics/menu/pinkstar.png', 'preview': '../graphics/preview/pinkstar.png', 'graphics': 'editor pinkstar'},
+
+    13: {'style': 'palm_fg', 'type': 'object', 'menu': 'palm fg', 'menu_surf': '../graphics/menu/small_fg.png', 'preview': '../graphics/preview/small_fg.png', 'graphics': 'palm small_fg'},
+    14: {'style': 'palm_fg', 'type': 'object', 'menu': 'palm fg', 'menu_surf': '../graphics/menu/large_fg.png', 'preview': '../graphics/preview/large_fg.png', 'graphics': 'palm large_fg'},
+    15: {'style': 'palm_fg', 'type': 'object', 'menu': 'palm fg', 'menu_surf': '../graphics/menu/left_fg.png',  'preview': '../graphics/preview/left_fg.png',  'graphics': 'palm left_fg'},
+    16: {'style': 'palm_fg', 'type': 'object', 'menu': 'palm fg', 'menu_surf': '../graphics/menu/right_fg.png', 'preview': '../graphics/preview/right_fg.png', 'graphics': 'palm right_fg'},
+
+    17: {'style': 'palm_bg', 'type': 'object', 'menu': 'palm bg', 'menu_surf': '../graphics/menu/small_bg.png', 'preview': '../graphics/preview/small_bg.png', 'graphics': 'palm small_bg'},
+    18: {'style': 'palm_bg', 'type': 'object', 'menu': 'palm bg', 'menu_surf': '../graphics/menu/large_bg.png', 'preview': '../graphics/preview/large_bg.png', 'graphics': 'palm large_bg'},
+    19: {'style': 'palm_bg', 'type': 'object', 'menu': 'palm bg', 'menu_surf': '../graphics/menu/left_bg.png',  'preview': '../graphics/preview/left_bg.png',  'graphics': 'palm left_bg'},
+    20: {'style': 'palm_bg', 'type': 'object', 'menu': 'palm bg', 'menu_surf': '../graphics/menu/right_bg.png', 'preview': '../graphics/preview/right_bg.png', 'graphics': 'palm right_bg'},
+
+    21: {'style': 'flag', 'type': 'tile', 'menu': 'coin', 'menu_surf': '../graphics/menu/flag.png', 'preview': '../graphics/preview/flag.png', 'graphics': 'flag'}
+}
+
+# 资源表：名称 -> 资源描述，type 为 image / folder / folder dict / animation / sound
+ASSETS = {
+    'land':             {'type': 'folder dict', 'path': '../graphics/terrain/land'},
+    'water bottom':     {'type': 'image',       'path': '../graphics/terrain/water/water_bottom.png'},
+    'water top':        {'type': 'folder',      'path': '../graphics/terrain/water/animation'},
+    'gold':             {'type': 'folder',      'path': '../graphics/items/gold'},
+    'silver':           {'type': 'folder',      'path': '../graphics/items/silver'},
+    'diamond':          {'type': 'folder',      'path': '../graphics/items/diamond'},
+    'coin particle':    {'type': 'folder',      'path': '../graphics/items/particle'},
+    'spikes':           {'type': 'image',       'path': '../graphics/enemies/spikes/spikes.png'},
+    'tooth':            {'type': 'animation',   'path': '../graphics/enemies/tooth', 'orientation': 'left'},
+    'shell':            {'type': 'animation',   'path': '../graphics/enemies/shell_left', 'orientation': 'left'},
+    'pearl':            {'type': 'image',       'path': '../graphics/enemies/pearl/pearl.png'},
+    'crabby':           {'type': 'animation',   'path': '../graphics/enemies/crabby', 'orientation': 'left'},
+    'pinkstar':         {'type': 'animation',   'path': '../graphics/enemies/pinkstar', 'orientation': 'left'},
+    'palm small_fg':    {'type': 'folder',      'path': '../graphics/terrain/palm/small_fg'},
+    'palm large_fg':    {'type': 'folder',      'path': '../graphics/terrain/palm/large_fg'},
+    'palm left_fg':     {'type': 'folder',      'path': '../graphics/terrain/palm/left_fg'},
+    'palm right_fg':    {'type': 'folder',      'path': '../graphics/terrain/palm/right_fg'},
+    'palm small_bg':    {'type': 'folder',      'path': '../graphics/terrain/palm/small_bg'},
+    'palm large_bg':    {'type': 'folder',      'path': '../graphics/terrain/palm/large_bg'},
+    'palm left_bg':     {'type': 'folder',      'path': '../graphics/terrain/palm/left_bg'},
+    'palm right_bg':    {'type': 'folder',      'path': '../graphics/terrain/palm/right_bg'},
+    'flag':             {'type': 'folder',      'path': '../graphics/flag'},
+    'clouds':           {'type': 'folder',      'path': '../graphics/clouds'},
+    'player':           {'type': 'animation',   'path': '../graphics/player', 'orientation': 'right', 'scale2x': True, 'numeric': True},
+    'player particles': {'type': 'animation',   'path': '../graphics/player_particles', 'orientation': 'right', 'scale2x': True, 'numeric': True},
+    'cursor':           {'type': 'image',       'path': '../graphics/cursors/mouse.png'},
+
+    # overworld
+    'hat':              {'type': 'image',       'path': '../graphics/overworld/hat.png'},
+    'node 0':           {'type': 'folder',      'path': '../graphics/overworld/level_0'},
+    'node 1':           {'type': 'folder',      'path': '../graphics/overworld/level_1'},
+    'node 2':           {'type': 'folder',      'path': '../graphics/overworld/level_2'},
+    'node 3':           {'type': 'folder',      'path': '../graphics/overworld/level_3'},
+    'node 4':           {'type': 'folder',      'path': '../graphics/overworld/level_4'},
+    'node 5':           {'type': 'folder',      'path': '../graphics/overworld/level_5'},
+
+    # editor
+    'sky handle':       {'type': 'image',       'path': '../graphics/cursors/handle.png'},
+    'editor player':    {'type': 'folder',      'path': '../graphics/player/idle'},
+    'editor spikes':    {'type': 'folder',      'path': '../graphics/enemies/spikes'},
+    'editor tooth':     {'type': 'folder',      'path': '../graphics/enemies/tooth/idle'},
+    'editor shell_left':  {'type': 'folder',    'path': '../graphics/enemies/shell_left/idle'},
+    'editor shell_right': {'type': 'folder',    'path': '../graphics/enemies/shell_right/idle'},
+    'editor crabby':    {'type': 'folder',      'path': '../graphics/enemies/crabby/idle'},
+    'editor pinkstar':  {'type': 'folder',      'path': '../graphics/enemies/pinkstar/idle'},
+
+    # sounds
+    'coin sound':       {'type': 'sound',       'path': '../audio/level/coin/coin.wav'},
+    'hit sound':        {'type': 'sound',       'path': '../audio/level/player/hit.wav'},
+    'jump sound':       {'type': 'sound',       'path': '../audio/level/player/jump.wav'},
+    'attack 0 sound':   {'type': 'sound',       'path': '../audio/level/player/attack 0.mp3'},
+    'attack 1 sound':   {'type': 'sound',       'path': '../audio/level/player/attack 1.mp3'},
+    'attack 2 sound':   {'type': 'sound',       'path': '../audio/level/player/attack 2.mp3'},
+    'tooth hit sound':  {'type': 'sound',       'path': '../audio/level/tooth/hit.mp3'},
+}
+
+# 背景音乐（流式播放）
+MUSIC_TRACKS = {
+    'level':     {'path': '../audio/level/SuperHero.ogg',           'volume': 0.01},
+    'overworld': {'path': '../audio/overworld/overworld_music.wav', 'volume': 0.05},
+    'editor':    {'path': '../audio/editor/Explorer.ogg',           'volume': 0.01},
 }
 
+# 每个关卡都需要的资源
+LEVEL_COMMON_ASSETS = ('player', 'player particles', 'coin particle', 'clouds')
+
+# tile id -> 需要的关卡资源
+TILE_ASSETS = {
+    2: ('land',),
+    3: ('water bottom', 'water top'),
+    4: ('gold',),
+    5: ('silver',),
+    6: ('diamond',),
+    7: ('spikes',),
+    8: ('tooth', 'tooth hit sound'),
+    9: ('shell', 'pearl'),
+    10: ('shell', 'pearl'),
+    11: ('crabby',),
+    12: ('pinkstar',),
+    13: ('palm small_fg',),
+    14: ('palm large_fg',),
+    15: ('palm left_fg',),
+    16: ('palm right_fg',),
+    17: ('palm small_bg',),
+    18: ('palm large_bg',),
+    19: ('palm left_bg',),
+    20: ('palm right_bg',),
+    21: ('flag',),
+}
+
+# 会在地面上巡逻的敌人（tooth、pinkstar），烘焙时预先计算巡逻区间
+PATROL_TILES = (8, 12)
+
+# 提供碰撞体的tile（贝壳、前景棕榈树），按块加载时先于其他物体生成
+COLLIDER_TILES = (9, 10, 13, 14, 15, 16)
+
 # 检查周围方块的八个方向
 NEIGHBOR_DIRECTIONS = {
     'A': (0, -1),
@@ -95,6 +219,8 @@ PINKSTAR_ANIMATION_STATUS = {
     'run': {'times': 'cyclic', 'interruptible': True}
 }
 
+ENEMY_HIT_FLASH = True  # 敌人受击时显示白色剪影
+
 GAME_STATUS = {
     'overworld': 0,
     'level 1': 1,
@@ -0,0 +1,109 @@
+from itertools import count
+
+import pygame
+
+from settings import *
+
+
+# 均匀网格空间哈希：按格子记录与之相交的精灵，查询时只检查矩形覆盖的格子
+class SpatialHash:
+    def __init__(self, cell_size=SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (col, row) -> 精灵集合
+        self.sprite_spans = {}  # 精灵 -> 所占格子范围 (left, top, right, bottom)
+
+    def get_span(self, rect):
+        size = self.cell_size
+        return (
+            rect.left // size,
+            rect.top // size,
+            max(rect.right - 1, rect.left) // size,
+            max(rect.bottom - 1, rect.top) // size
+        )
+
+    @staticmethod
+    def span_cells(span):
+        left, top, right, bottom = span
+        for col in range(left, right + 1):
+            for row in range(top, bottom + 1):
+                yield col, row
+
+    def insert(self, sprite, rect):
+        span = self.get_span(rect)
+        if self.sprite_spans.get(sprite) == span:  # 格子范围未变，无需更新
+            return
+        self.remove(sprite)
+        self.sprite_spans[sprite] = span
+        for cell in self.span_cells(span):
+            self.cells.setdefault(cell, set()).add(sprite)
+
+    def remove(self, sprite):
+        span = self.sprite_spans.pop(sprite, None)
+        if span is None:
+            return
+        for cell in self.span_cells(span):
+            bucket = self.cells[cell]
+            bucket.discard(sprite)
+            if not bucket:
+                del self.cells[cell]
+
+    # 返回与矩形所在格子相交的精灵（粗检测，精确检测由调用者完成）
+    def query(self, rect):
+        found = set()
+        for cell in self.span_cells(self.get_span(rect)):
+            bucket = self.cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        return found
+
+    def clear(self):
+        self.cells.clear()
+        self.sprite_spans.clear()
+
+
+# 带空间索引的精灵组，精灵移动后调用 reindex 标记，下一次查询前统一更新
+class SpatialGroup(pygame.sprite.Group):
+    def __init__(self, *sprites, rect_attr='rect', cell_size=SPATIAL_CELL_SIZE):
+        self.rect_attr = rect_attr
+        self.spatial_hash = SpatialHash(cell_size)
+        self.dirty_sprites = set()  # 新加入或移动过的精灵
+        self.order = count()
+        self.sprite_order = {}  # 加入顺序，用于保持绘制顺序
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.sprite_order[sprite] = next(self.order)
+        self.dirty_sprites.add(sprite)  # 构造函数中rect可能尚未确定，延迟到查询时插入
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        del self.sprite_order[sprite]
+        self.dirty_sprites.discard(sprite)
+        self.spatial_hash.remove(sprite)
+
+    # 指定精灵的绘制顺序，之后加入的精灵排在order之后
+    def set_order(self, sprite, order):
+        if sprite in self.sprite_order:
+            self.sprite_order[sprite] = order
+
+    # 让之后加入的精灵排在 0 ~ size-1 这些预留的顺序之后
+    def reserve_order(self, size):
+        self.order = count(max(next(self.order), size))
+
+    def reindex(self, sprite):
+        if sprite in self.sprite_order:
+            self.dirty_sprites.add(sprite)
+
+    def flush(self):
+        for sprite in self.dirty_sprites:
+            self.spatial_hash.insert(sprite, getattr(sprite, self.rect_attr))
+        self.dirty_sprites.clear()
+
+    def query(self, rect):
+        self.flush()
+        return self.spatial_hash.query(rect)
+
+    # 按加入顺序返回与矩形相交的精灵
+    def ordered_query(self, rect):
+        return sorted(self.query(rect), key=self.sprite_order.__getitem__)
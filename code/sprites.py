@@ -4,34 +4,43 @@ from random import randint
 import pygame
 from pygame.math import Vector2 as vector
 
+from animation import animation_clock
 from settings import *
+from spatial_hash import SpatialGroup
 from timer import Timer
 
 
 class Generic(pygame.sprite.Sprite):
     def __init__(self, pos, surf, group, z=LEVEL_LAYERS['main']):
+        self.z = z  # 加入CameraGroup时按z分层，需先于加入组设置
         super().__init__(group)
         self.image = surf
         self.rect = self.image.get_rect(topleft=pos)
-        self.z = z
 
+    # 位置变化后通知所在的空间索引组
+    def reindex(self):
+        for group in self.groups():
+            if isinstance(group, SpatialGroup):
+                group.reindex(self)
 
-class Block(Generic):
+
+# 只有矩形的碰撞体（棕榈树平台），不绘制
+class Block(pygame.sprite.Sprite):
     def __init__(self, pos, size, group):
-        surf = pygame.Surface(size)
-        super().__init__(pos, surf, group)
+        super().__init__(group)
+        self.rect = pygame.Rect(pos, size)
 
 
 class Animated(Generic):
+    ambient = True  # 循环的环境动画，读取全局动画时钟，离开摄像机附近时不更新
+
     def __init__(self, assets, pos, group, z=LEVEL_LAYERS['main']):
         self.animation_frames = assets
         self.frame_index = 0
         super().__init__(pos, self.animation_frames[self.frame_index], group, z)
 
     def animate(self, dt):
-        self.frame_index += ANIMATION_SPEED * dt
-        self.frame_index = 0 if self.frame_index >= len(self.animation_frames) else self.frame_index
-        self.image = self.animation_frames[int(self.frame_index)]
+        self.image = animation_clock.frame(self.animation_frames)
 
     def update(self, dt):
         self.animate(dt)
@@ -48,12 +57,13 @@ class Cloud(Generic):
     def update(self, dt):
         self.pos.x -= self.speed * dt
         self.rect.x = round(self.pos.x)
+        self.reindex()
         if self.rect.x <= self.left_limit:
             self.kill()
 
 
 class Player(Generic):
-    def __init__(self, pos, assets, particles, group, collision_sprites, attackable_sprites, hit_sound, jump_sound, attack_sounds):
+    def __init__(self, pos, assets, particles, group, collision_map, attackable_sprites, hit_sound, jump_sound, attack_sounds):
         # 动画
         self.animation_frames = assets
         self.frame_index = 0  # 玩家动画帧索引
@@ -69,9 +79,9 @@ class Player(Generic):
         self.gravity = 5
         self.on_floor = False  # hitbox下一像素检测是否是地面
         # 碰撞
-        self.collision_sprites = collision_sprites
+        self.collision_map = collision_map
         self.hitbox = self.rect.inflate(-95, -34)
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = self.animation_frames.mask(self.status, int(self.frame_index), self.orientation)
         # 攻击
         self.attackable_sprites = attackable_sprites
         self.dealt_damage_flag = False  # 为了保证一次攻击只造成一次伤害
@@ -91,6 +101,10 @@ class Player(Generic):
         self.hit_sound.play()
         self.direction.y = -1  # 飞起一段距离
 
+    # 无敌时间内显示当前帧的白色剪影
+    def flash(self):
+        self.image = self.animation_frames.flash(self.status, int(self.frame_index), self.orientation)
+
     def common_status(self):
         if self.common_status_active:
             if self.direction.y < 0:
@@ -104,15 +118,15 @@ class Player(Generic):
 
     # 玩家动画
     def animate(self, dt):
-        current_animation = self.animation_frames[self.status]
+        current_animation = self.animation_frames.get_frames(self.status, self.orientation)
         self.frame_index += ANIMATION_SPEED * dt
         if self.frame_index >= len(current_animation):
             self.frame_index = 0
             if not PLAYER_ANIMATION_STATUS[self.status]['interruptible']:  # 不可打断的动画播放完毕重新开启common_status
                 self.common_status_active = True
 
-        self.image = current_animation[int(self.frame_index)] if self.orientation == 'right' else pygame.transform.flip(current_animation[int(self.frame_index)], True, False)
-        self.mask = pygame.mask.from_surface(self.image)
+        self.image = current_animation[int(self.frame_index)]
+        self.mask = self.animation_frames.mask(self.status, int(self.frame_index), self.orientation)
 
     def input(self):
         keys = pygame.key.get_pressed()
@@ -181,7 +195,7 @@ class Player(Generic):
                     size = (0, 0)
                     lefttop = (0, 0)
             detection_zone = pygame.Rect(lefttop, size)
-            for sprite in self.attackable_sprites:
+            for sprite in self.attackable_sprites.ordered_query(detection_zone):
                 if detection_zone.colliderect(sprite.hitbox):
                     sprite.hit(self.base_damage)
                     self.hit_sound.play()
@@ -207,6 +221,7 @@ class Player(Generic):
         self.hitbox.centery = round(self.pos.y)
         self.rect.centery = self.hitbox.centery
         self.collision('vertical')
+        self.reindex()
 
     def apply_gravity(self, dt):
         self.direction.y += self.gravity * dt
@@ -214,20 +229,19 @@ class Player(Generic):
 
     def check_on_floor(self):
         floor_rect = pygame.Rect(self.hitbox.bottomleft, (self.hitbox.width, 1))
-        floor_sprites = [sprite for sprite in self.collision_sprites if sprite.rect.colliderect(floor_rect)]
-        self.on_floor = True if floor_sprites else False
+        self.on_floor = self.collision_map.solid_rect(floor_rect)
 
     def collision(self, direction):
-        for sprite in self.collision_sprites:
-            if sprite.rect.colliderect(self.hitbox):
+        for rect in self.collision_map.colliding_rects(self.hitbox):
+            if rect.colliderect(self.hitbox):
                 if direction == 'horizontal':
-                    self.hitbox.right = sprite.rect.left if self.direction.x > 0 else self.hitbox.right
-                    self.hitbox.left = sprite.rect.right if self.direction.x < 0 else self.hitbox.left
+                    self.hitbox.right = rect.left if self.direction.x > 0 else self.hitbox.right
+                    self.hitbox.left = rect.right if self.direction.x < 0 else self.hitbox.left
                     self.rect.centerx = self.hitbox.centerx
                     self.pos.x = self.hitbox.centerx
                 else:  # vertical
-                    self.hitbox.top = sprite.rect.bottom if self.direction.y < 0 else self.hitbox.top
-                    self.hitbox.bottom = sprite.rect.top if self.direction.y > 0 else self.hitbox.bottom
+                    self.hitbox.top = rect.bottom if self.direction.y < 0 else self.hitbox.top
+                    self.hitbox.bottom = rect.top if self.direction.y > 0 else self.hitbox.bottom
                     self.rect.centery = self.hitbox.centery
                     self.pos.y = self.hitbox.centery
                     self.direction.y = 0
@@ -248,6 +262,8 @@ class Player(Generic):
 
 
 class JumpParticles(Animated):
+    ambient = False
+
     def __init__(self, assets, pos, group):
         super().__init__(assets, pos, group)
         self.rect = self.image.get_rect(center=pos)
@@ -261,6 +277,8 @@ class JumpParticles(Animated):
 
 
 class FallParticles(Animated):
+    ambient = False
+
     def __init__(self, assets, pos, group):
         super().__init__(assets, pos, group)
         self.rect = self.image.get_rect(center=pos)
@@ -291,6 +309,8 @@ class Coin(Animated):
 
 # 拾取金币粒子特效
 class CoinParticles(Animated):
+    ambient = False
+
     def __init__(self, assets, pos, group):
         super().__init__(assets, pos, group)
         self.rect = self.image.get_rect(center=pos)
@@ -312,25 +332,24 @@ class Spikes(Generic):
 
 
 class Shell(Generic):
+    sleeps = True  # 离开摄像机附近时休眠，计时器按真实时间计算，醒来时自然追上
+
     def __init__(self, orientation, assets, pos, group, pearl_surf, damage_sprites):
         self.orientation = orientation
-        self.animation_frames = assets.copy()
-        if orientation == 'right':
-            for key, value in self.animation_frames.items():
-                self.animation_frames[key] = [pygame.transform.flip(surf, True, False) for surf in value]
-
+        self.animation_frames = assets  # 两个朝向的帧在加载时已生成，所有贝壳共享
         self.frame_index = 0
         self.status = 'idle'
-        super().__init__(pos, self.animation_frames[self.status][self.frame_index], group)
+        super().__init__(pos, self.animation_frames.get_frames(self.status, self.orientation)[self.frame_index], group)
         self.rect.bottom = self.rect.top + TILE_SIZE
 
         self.pearl_surf = pearl_surf
         self.has_shot = False
         self.attack_cooldown = Timer(2000)  # 攻击冷却时间
         self.damage_group = damage_sprites
+        self.all_sprites = group[0]
 
     def animate(self, dt):
-        current_animation = self.animation_frames[self.status]
+        current_animation = self.animation_frames.get_frames(self.status, self.orientation)
         self.frame_index += ANIMATION_SPEED * dt
         if self.frame_index >= len(current_animation):
             self.frame_index = 0
@@ -342,7 +361,7 @@ class Shell(Generic):
         if int(self.frame_index) == 2 and self.status == 'attack' and not self.has_shot:
             pearl_direction = vector(-1, 0) if self.orientation == 'left' else vector(1, 0)
             offset = (pearl_direction * 50) + vector(0, -10) if self.orientation == 'left' else (pearl_direction * 20) + vector(0, -10)
-            Pearl(self.rect.center + offset, pearl_direction, self.pearl_surf, [self.groups()[0], self.damage_group])
+            Pearl(self.rect.center + offset, pearl_direction, self.pearl_surf, [self.all_sprites, self.damage_group])
             self.has_shot = True
 
     def get_status(self):
@@ -375,6 +394,7 @@ class Pearl(Generic):
         self.pos.x += self.direction.x * self.speed * dt
         self.rect.x = round(self.pos.x)
         self.hitbox.center = self.rect.center
+        self.reindex()
         # 计时器
         self.timer.update()
         if not self.timer.active:
@@ -0,0 +1,127 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from settings import *
+from support import bake_chunk, chunk_tiles
+
+
+# 按块加载关卡：静态图块和物体只在摄像机附近的块中存在，离开后卸载
+# 物体在它出生的块激活时生成，出生的块和当前所在的块都离开范围时才卸载（敌人可能走到别的块中）
+# 被拾取的金币和被击杀的敌人记录在consumed中，块再次激活时不再生成
+class ChunkStreamer:
+    def __init__(self, chunk_size, static_tiles, place_static, spawn):
+        self.chunk_size = chunk_size
+        self.place_static = place_static  # (pos, surf, z) -> 精灵
+        self.spawn = spawn  # (*args) -> [精灵]
+        self.static_chunks = {}  # (col, row) -> {z: [(surf, rect)]}
+        for z, tiles in static_tiles.items():
+            for key, pieces in chunk_tiles(tiles, chunk_size).items():
+                self.static_chunks.setdefault(key, {})[z] = pieces
+
+        self.entries = []  # [spawn的参数]
+        self.chunk_entries = {}  # (col, row) -> [entries中的下标]
+        self.consumed = bytearray()
+        self.first = bytearray()  # 其他物体依赖的碰撞体（棕榈树平台、贝壳），同一批激活的块中先于其他物体生成
+
+        self.active = {}  # (col, row) -> [静态图块精灵]
+        self.spawned = {}  # entries中的下标 -> (出生的块, [精灵])
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.baking = {}  # (col, row) -> future，后台烘焙的静态图块
+        self.closed = False
+
+    def chunk_key(self, pos):
+        return int(pos[0]) // self.chunk_size, int(pos[1]) // self.chunk_size
+
+    # 物体按pos所在的块加载
+    def add(self, pos, *args, first=False):
+        key = self.chunk_key(pos)
+        self.chunk_entries.setdefault(key, []).append(len(self.entries))
+        self.entries.append(args)
+        self.consumed.append(0)
+        self.first.append(first)
+
+    def chunk_keys(self, rect):
+        size = self.chunk_size
+        return {
+            (col, row)
+            for col in range(rect.left // size, (rect.right - 1) // size + 1)
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1)
+            if (col, row) in self.static_chunks or (col, row) in self.chunk_entries
+        }
+
+    # 不调用convert，在后台线程中执行
+    def bake_static(self, key):
+        col, row = key
+        chunk_rect = pygame.Rect(col * self.chunk_size, row * self.chunk_size, self.chunk_size, self.chunk_size)
+        return {z: bake_chunk(pieces, chunk_rect) for z, pieces in self.static_chunks.get(key, {}).items()}
+
+    def activate(self, key):
+        future = self.baking.pop(key, None)
+        baked = future.result() if future is not None else self.bake_static(key)
+        self.active[key] = [self.place_static(pos, surf.convert_alpha(), z) for z, (pos, surf) in baked.items()]
+
+    # 生成一批块中的物体：先生成所有碰撞体，再按关卡数据中的顺序生成其余物体，
+    # 这样敌人构造时检测脚下的地面不受块激活顺序的影响
+    def spawn_entries(self, keys):
+        pending = [
+            (not self.first[index], index, key)
+            for key in keys for index in self.chunk_entries.get(key, ())
+            if not self.consumed[index] and index not in self.spawned
+        ]
+        for _, index, key in sorted(pending):
+            sprites = self.spawn(*self.entries[index])
+            if sprites and sprites[0].alive():  # 构造时自行删除的物体（例如不在地面上的敌人）下次激活时再尝试
+                self.spawned[index] = (key, sprites)
+
+    def deactivate(self, key):
+        for sprite in self.active.pop(key):
+            sprite.kill()
+
+    # 卸载出生的块和当前所在的块都与keep_rect不相交的物体；已经消失或死亡的物体记为consumed
+    def despawn(self, keep_rect):
+        size = self.chunk_size
+        left, top = keep_rect.left // size, keep_rect.top // size
+        right, bottom = (keep_rect.right - 1) // size, (keep_rect.bottom - 1) // size
+
+        def kept(key):
+            return left <= key[0] <= right and top <= key[1] <= bottom
+
+        for index, (key, sprites) in list(self.spawned.items()):
+            alive = sprites[0].alive()
+            if alive and (kept(key) or kept(self.chunk_key(sprites[0].rect.center))):
+                continue
+            if not alive or getattr(sprites[0], 'is_dead', False):
+                self.consumed[index] = 1
+            for sprite in sprites:
+                sprite.kill()
+            del self.spawned[index]
+
+    # view_rect: 摄像机矩形（世界坐标）
+    def update(self, view_rect):
+        if self.closed:
+            return
+        keep_rect = view_rect.inflate(STREAM_KEEP_MARGIN * 2, STREAM_KEEP_MARGIN * 2)
+        wanted = self.chunk_keys(view_rect.inflate(STREAM_MARGIN * 2, STREAM_MARGIN * 2))
+        keep = self.chunk_keys(keep_rect)
+
+        for key in [key for key in self.active if key not in keep]:
+            self.deactivate(key)
+        self.despawn(keep_rect)
+        activated = sorted(key for key in wanted if key not in self.active)
+        for key in activated:
+            self.activate(key)
+        self.spawn_entries(activated)
+
+        # 即将进入范围的块提前在后台烘焙
+        for key in [key for key in self.baking if key not in keep]:
+            self.baking.pop(key).cancel()
+        for key in keep:
+            if key not in self.active and key not in self.baking and key in self.static_chunks:
+                self.baking[key] = self.executor.submit(self.bake_static, key)
+
+    # 离开关卡时停止后台烘焙
+    def close(self):
+        self.closed = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.baking = {}
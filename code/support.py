@@ -1,53 +1,63 @@
-import os.path
-from os import walk
-
 import pygame
 
-
-# 资源导入
-def import_folder(path):
-    surface_list = []
-
-    for folder_name, sub_folders, img_files in walk(path):
-        for img_name in img_files:
-            full_path = path + '/' + img_name
-            img_surf = pygame.image.load(full_path).convert_alpha()
-            surface_list.append(img_surf)
-
-    return surface_list
-
-
-def import_folder_dict(path):
-    surface_dict = {}
-
-    for folder_name, sub_folders, img_files in walk(path):
-        for img_name in img_files:
-            full_path = path + '/' + img_name
-            img_surf = pygame.image.load(full_path).convert_alpha()
-            surface_dict[img_name.split('.')[0]] = img_surf
-
-    return surface_dict
-
-
-def import_folder2x(path):
-    surface_list = []
-
-    for folder_name, sub_folders, img_files in walk(path):
-        for img_name in sorted(img_files, key=lambda file_name: int(os.path.splitext(file_name)[0])):
-            full_path = path + '/' + img_name
-            img_surf = pygame.transform.scale2x(pygame.image.load(full_path).convert_alpha())
-            surface_list.append(img_surf)
-
-    return surface_list
-
-
-def import_folder_dict2x(path):
-    surface_dict = {}
-
-    for folder_name, sub_folders, img_files in walk(path):
-        for img_name in sorted(img_files, key=lambda file_name: int(os.path.splitext(file_name)[0])):
-            full_path = path + '/' + img_name
-            img_surf = pygame.transform.scale2x(pygame.image.load(full_path).convert_alpha())
-            surface_dict[img_name.split('.')[0]] = img_surf
-
-    return surface_dict
+from settings import *
+
+
+# 把tile按所在的块分组 {(col, row): [(surf, rect)]}，跨块的tile会出现在多个块中
+def chunk_tiles(tiles, chunk_size):
+    chunks = {}
+    for surf, pos in tiles:
+        rect = surf.get_rect(topleft=pos)
+        for col in range(rect.left // chunk_size, (rect.right - 1) // chunk_size + 1):
+            for row in range(rect.top // chunk_size, (rect.bottom - 1) // chunk_size + 1):
+                chunks.setdefault((col, row), []).append((surf, rect))
+    return chunks
+
+
+# 把一个块中的tile绘制到一张surface上，返回 (左上角, surface)；不调用convert，可以在后台线程中执行
+def bake_chunk(pieces, chunk_rect):
+    bounds = pieces[0][1].unionall([rect for _, rect in pieces]).clip(chunk_rect)  # 只分配实际用到的区域
+    chunk_surf = pygame.Surface(bounds.size, pygame.SRCALPHA)
+    chunk_surf.blits([(surf, (rect.x - bounds.x, rect.y - bounds.y)) for surf, rect in pieces], False)
+    return bounds.topleft, chunk_surf
+
+
+# 将静态图块合并绘制到按块划分的大surface上，返回 [(topleft, surface)]
+def bake_chunks(tiles, chunk_size):
+    for (col, row), pieces in chunk_tiles(tiles, chunk_size).items():
+        pos, chunk_surf = bake_chunk(pieces, pygame.Rect(col * chunk_size, row * chunk_size, chunk_size, chunk_size))
+        yield pos, chunk_surf.convert_alpha()
+
+
+# 烘焙数据中按类型分组的生成点 {tile id: [(x, y), ...]}
+def cooked_spawns(spawns):
+    grouped = {}
+    index = 0
+    while index < len(spawns):
+        tile_id, count = spawns[index], spawns[index + 1]
+        coords = spawns[index + 2:index + 2 + count * 2]
+        grouped[tile_id] = [(coords[i], coords[i + 1]) for i in range(0, count * 2, 2)]
+        index += 2 + count * 2
+    return grouped
+
+
+# 关卡中出现的tile id（地形和水按类型记录，其余图层直接保存id）
+def grid_tile_ids(grid, cooked=None):
+    tile_ids = set()
+    for layer_name, layer in grid.items():
+        if layer_name in ('terrain', 'water'):
+            if layer:
+                tile_ids.add(2 if layer_name == 'terrain' else 3)
+        elif not cooked:
+            tile_ids.update(layer.values())
+    if cooked:
+        tile_ids.update(cooked_spawns(cooked['spawns']))
+    return tile_ids
+
+
+# 关卡需要的资源名，按settings.ASSETS中的顺序
+def level_asset_names(grid, cooked=None):
+    names = set(LEVEL_COMMON_ASSETS)
+    for tile_id in grid_tile_ids(grid, cooked):
+        names.update(TILE_ASSETS.get(tile_id, ()))
+    return [name for name in ASSETS if name in names]
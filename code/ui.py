@@ -23,6 +23,15 @@ class UI:
         health_bar_rect = pygame.Rect(self.health_bar_topleft, (current_bar_width, self.bar_height))
         pygame.draw.rect(self.display_surface, HEALTH_BAR_COLOR, health_bar_rect)
 
+    def show_loading(self, progress):
+        self.display_surface.fill(BUTTON_BG_COLOR)
+        bar_rect = pygame.Rect(0, 0, 400, 16)
+        bar_rect.center = (WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2)
+        pygame.draw.rect(self.display_surface, HEALTH_BAR_COLOR, (bar_rect.topleft, (bar_rect.width * progress, bar_rect.height)))
+        pygame.draw.rect(self.display_surface, BUTTON_LINE_COLOR, bar_rect.inflate(8, 8), 2)
+        text_surf = self.font.render('loading', False, BUTTON_LINE_COLOR)
+        self.display_surface.blit(text_surf, text_surf.get_rect(midbottom=(bar_rect.centerx, bar_rect.top - 20)))
+
     def show_coins(self, amount):
         self.display_surface.blit(self.coin, self.coin_rect)
         coin_amount_surf = self.font.render(str(amount), False, FONT_COLOR)
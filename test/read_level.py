@@ -0,0 +1,10 @@
+import sys
+
+sys.path.append('../code')
+from level_format import read_level
+
+
+grid, sections = read_level('../level_data/data.lvl')
+for layer_name, layer in grid.items():
+    print(layer_name, dict(layer))
+print(sections)